@@ -0,0 +1,36 @@
+"""Enable hll extension if available
+
+Revision ID: 5c1e9a7d3b2f
+Revises: 43bf797ed3f3
+Create Date: 2026-10-14 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d3b2f'
+down_revision: Union[str, Sequence[str], None] = '43bf797ed3f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # postgresql-hll is not bundled with stock Postgres images: install it only
+    # where the server provides it (ANALYTICS_USE_HLL stays off otherwise).
+    op.execute(
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'hll') THEN "
+        "CREATE EXTENSION IF NOT EXISTS hll; "
+        "END IF; "
+        "END $$"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP EXTENSION IF EXISTS hll")
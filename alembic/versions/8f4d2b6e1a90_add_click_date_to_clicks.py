@@ -0,0 +1,35 @@
+"""Add click_date generated column to clicks
+
+Revision ID: 8f4d2b6e1a90
+Revises: 5c1e9a7d3b2f
+Create Date: 2026-10-14 11:02:19.540876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4d2b6e1a90'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a7d3b2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clicks', sa.Column(
+        'click_date',
+        sa.Date(),
+        sa.Computed("((created_at) AT TIME ZONE 'UTC')::date", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_clicks_url_id_click_date', 'clicks', ['url_id', 'click_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clicks_url_id_click_date', table_name='clicks')
+    op.drop_column('clicks', 'click_date')
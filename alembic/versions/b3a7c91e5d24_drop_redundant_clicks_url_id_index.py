@@ -0,0 +1,29 @@
+"""Drop redundant ix_clicks_url_id index
+
+Revision ID: b3a7c91e5d24
+Revises: 8f4d2b6e1a90
+Create Date: 2026-10-14 11:40:05.112734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3a7c91e5d24'
+down_revision: Union[str, Sequence[str], None] = '8f4d2b6e1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ix_clicks_url_id_created_at already serves url_id prefix lookups
+    op.drop_index(op.f('ix_clicks_url_id'), table_name='clicks', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_clicks_url_id'), 'clicks', ['url_id'], unique=False)
@@ -0,0 +1,43 @@
+"""Add clicks_daily materialized view
+
+Revision ID: d91f0c4a7e63
+Revises: b3a7c91e5d24
+Create Date: 2026-10-14 12:25:48.903317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91f0c4a7e63'
+down_revision: Union[str, Sequence[str], None] = 'b3a7c91e5d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The rollup stores an hll sketch per day, so it is only created when the
+    # hll extension is installed (see 5c1e9a7d3b2f); ANALYTICS_USE_ROLLUP stays off otherwise.
+    op.execute(
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'hll') THEN "
+        "EXECUTE 'CREATE MATERIALIZED VIEW clicks_daily AS "
+        "SELECT url_id, click_date, count(*) AS clicks, "
+        "min(created_at) AS first_click, max(created_at) AS last_click, "
+        "hll_add_agg(hll_hash_text(ip_address)) AS visitors "
+        "FROM clicks GROUP BY url_id, click_date'; "
+        # A unique index is required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+        "EXECUTE 'CREATE UNIQUE INDEX ix_clicks_daily_url_id_click_date "
+        "ON clicks_daily (url_id, click_date)'; "
+        "END IF; "
+        "END $$"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS clicks_daily")
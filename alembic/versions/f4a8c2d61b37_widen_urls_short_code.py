@@ -0,0 +1,41 @@
+"""Widen urls.short_code to 32 characters
+
+Revision ID: f4a8c2d61b37
+Revises: e27b5d8c4f19
+Create Date: 2026-10-14 15:02:11.408213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8c2d61b37'
+down_revision: Union[str, Sequence[str], None] = 'e27b5d8c4f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Custom codes may be up to 20 characters; growing a varchar is a catalog-only change
+    op.alter_column(
+        'urls',
+        'short_code',
+        existing_type=sa.String(length=10),
+        type_=sa.String(length=32),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'urls',
+        'short_code',
+        existing_type=sa.String(length=32),
+        type_=sa.String(length=10),
+        existing_nullable=False,
+    )
@@ -2,7 +2,7 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import AsyncSessionLocal
-from app.core.config import settings, Settings
+from app.core.config import Settings, get_settings as get_cached_settings
 
 
 # ============================================
@@ -46,4 +46,4 @@ def get_settings() -> Settings:
         async def get_info(settings: Settings = Depends(get_settings)):
             return {"environment": settings.ENVIRONMENT}
     """
-    return settings
\ No newline at end of file
+    return get_cached_settings()
\ No newline at end of file
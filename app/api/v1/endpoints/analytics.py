@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from datetime import datetime, timedelta
+from sqlalchemy import select, func, or_, union_all, Integer
+from datetime import datetime, timedelta, timezone
 from typing import Literal
 
 from app.api.deps import get_db
+from app.core.config import settings
 from app.db.models.url import URL
 from app.db.models.click import Click
+from app.db.models.clicks_daily import clicks_daily
 from app.schemas.analytics import AnalyticsResponse, AnalyticsSummary, ClicksByDay
 
 router = APIRouter()
@@ -21,6 +23,118 @@ PERIOD_MAP = {
     "30d": timedelta(days=30),
 }
 
+# Most recent days read from raw clicks when serving from the clicks_daily rollup
+ROLLUP_RAW_DAYS = 2
+
+
+def _unique_visitors_expr(ip_address):
+    """
+    Unique visitors aggregate.
+
+    Exact COUNT(DISTINCT ip_address) by default. With ANALYTICS_USE_HLL, uses a
+    HyperLogLog sketch (Postgres hll extension): ~1% error, no hash/sort over
+    every matched IP.
+    """
+    if settings.ANALYTICS_USE_HLL:
+        return func.coalesce(
+            func.round(func.hll_cardinality(func.hll_add_agg(func.hll_hash_text(ip_address)))),
+            0,
+        ).cast(Integer)
+    return func.count(ip_address.distinct())
+
+
+def _analytics_statement(url_id: int, start_date: datetime | None):
+    """
+    Per-day click counts plus period totals, computed from raw clicks.
+
+    The CTE is scanned once; totals come from window functions over the
+    per-day groups, unique visitors from a scalar subquery on the same CTE.
+    """
+    base_condition = [Click.url_id == url_id]
+    if start_date:
+        base_condition.append(Click.created_at >= start_date)
+
+    base = (
+        select(
+            Click.ip_address,
+            Click.created_at,
+            Click.click_date,
+        )
+        .where(*base_condition)
+        .cte("base")
+    )
+    unique_visitors = select(_unique_visitors_expr(base.c.ip_address)).scalar_subquery()
+
+    return (
+        select(
+            base.c.click_date,
+            func.count().label("clicks"),
+            func.sum(func.count()).over().label("total_clicks"),
+            func.min(func.min(base.c.created_at)).over().label("first_click"),
+            func.max(func.max(base.c.created_at)).over().label("last_click"),
+            unique_visitors.label("unique_visitors"),
+        )
+        .group_by(base.c.click_date)
+        .order_by(base.c.click_date.asc())
+    )
+
+
+def _rollup_analytics_statement(url_id: int, start_date: datetime | None):
+    """
+    Same result shape as _analytics_statement, served from the clicks_daily rollup.
+
+    Complete days come from the materialized view; the most recent
+    ROLLUP_RAW_DAYS (not yet guaranteed to be refreshed) and the partial first
+    day of the period come from raw clicks, combined with UNION ALL. Unique
+    visitors are the union of the per-day hll sketches.
+    """
+    raw_from = datetime.now(timezone.utc).date() - timedelta(days=ROLLUP_RAW_DAYS - 1)
+
+    rollup_condition = [clicks_daily.c.url_id == url_id, clicks_daily.c.click_date < raw_from]
+    raw_condition = [Click.url_id == url_id]
+    if start_date:
+        start_day = start_date.date()
+        rollup_condition.append(clicks_daily.c.click_date > start_day)
+        raw_condition.append(Click.created_at >= start_date)
+        raw_condition.append(or_(Click.click_date >= raw_from, Click.click_date == start_day))
+    else:
+        raw_condition.append(Click.click_date >= raw_from)
+
+    rollup = select(
+        clicks_daily.c.click_date,
+        clicks_daily.c.clicks,
+        clicks_daily.c.first_click,
+        clicks_daily.c.last_click,
+        clicks_daily.c.visitors,
+    ).where(*rollup_condition)
+    raw = (
+        select(
+            Click.click_date,
+            func.count().label("clicks"),
+            func.min(Click.created_at).label("first_click"),
+            func.max(Click.created_at).label("last_click"),
+            func.hll_add_agg(func.hll_hash_text(Click.ip_address)).label("visitors"),
+        )
+        .where(*raw_condition)
+        .group_by(Click.click_date)
+    )
+    daily = union_all(rollup, raw).cte("daily")
+    unique_visitors = select(
+        func.coalesce(func.round(func.hll_cardinality(func.hll_union_agg(daily.c.visitors))), 0).cast(Integer)
+    ).scalar_subquery()
+
+    return (
+        select(
+            daily.c.click_date,
+            daily.c.clicks,
+            func.sum(daily.c.clicks).over().label("total_clicks"),
+            func.min(daily.c.first_click).over().label("first_click"),
+            func.max(daily.c.last_click).over().label("last_click"),
+            unique_visitors.label("unique_visitors"),
+        )
+        .order_by(daily.c.click_date.asc())
+    )
+
 
 @router.get(
     "/analytics/{short_code}",
@@ -39,11 +153,11 @@ async def get_analytics(
     - **period**: Time period (1d, 7d, 30d, all)
     """
     
-    # 1. Find the URL
+    # 1. Find the URL (only the columns used below; no ORM instance to hydrate)
     result = await db.execute(
-        select(URL).where(URL.short_code == short_code)
+        select(URL.id, URL.target_url, URL.created_at).where(URL.short_code == short_code)
     )
-    url = result.scalar_one_or_none()
+    url = result.first()
     
     if not url:
         raise HTTPException(
@@ -54,50 +168,38 @@ async def get_analytics(
     # 2. Calculate start_date based on period
     start_date = None
     if period != "all":
-        start_date = datetime.utcnow() - PERIOD_MAP[period]
-    
-    # 3. Base query condition
-    base_condition = [Click.url_id == url.id]
-    if start_date:
-        base_condition.append(Click.created_at >= start_date)
-    
-    # 4. Query summary stats
-    summary_result = await db.execute(
-        select(
-            func.count(Click.id).label("total_clicks"),
-            func.count(Click.ip_address.distinct()).label("unique_visitors"),
-            func.min(Click.created_at).label("first_click"),
-            func.max(Click.created_at).label("last_click"),
-        ).where(*base_condition)
-    )
-    summary_row = summary_result.one()
+        start_date = datetime.now(timezone.utc) - PERIOD_MAP[period]
     
-    summary = AnalyticsSummary(
-        total_clicks=summary_row.total_clicks,
-        unique_visitors=summary_row.unique_visitors,
-        first_click=summary_row.first_click,
-        last_click=summary_row.last_click,
-    )
-    
-    # 5. Query clicks by day
-    clicks_by_day_result = await db.execute(
-        select(
-            func.date(Click.created_at).label("click_date"),
-            func.count(Click.id).label("clicks"),
+    # 3. Query summary stats and clicks by day in a single round trip
+    if settings.ANALYTICS_USE_ROLLUP:
+        stmt = _rollup_analytics_statement(url.id, start_date)
+    else:
+        stmt = _analytics_statement(url.id, start_date)
+    result = await db.execute(stmt)
+
+    # 4. Build clicks by day straight from the result (no intermediate row list);
+    #    every row carries the period totals, so the first one yields the summary
+    clicks_by_day = []
+    totals = None
+    for row in result:
+        if totals is None:
+            totals = row
+        clicks_by_day.append(ClicksByDay(date=row.click_date, clicks=row.clicks))
+
+    if totals is not None:
+        summary = AnalyticsSummary(
+            total_clicks=int(totals.total_clicks),
+            unique_visitors=totals.unique_visitors,
+            first_click=totals.first_click,
+            last_click=totals.last_click,
         )
-        .where(*base_condition)
-        .group_by(func.date(Click.created_at))
-        .order_by(func.date(Click.created_at).asc())
-    )
-    
-    clicks_by_day = [
-        ClicksByDay(date=row.click_date, clicks=row.clicks)
-        for row in clicks_by_day_result.all()
-    ]
-    
-    # 6. Build response
+    else:
+        # No rows → no clicks in period
+        summary = AnalyticsSummary(total_clicks=0, unique_visitors=0)
+
+    # 5. Build response
     return AnalyticsResponse(
-        short_code=url.short_code,
+        short_code=short_code,
         target_url=url.target_url,
         created_at=url.created_at,
         summary=summary,
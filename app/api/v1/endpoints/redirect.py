@@ -3,11 +3,16 @@ import time
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
 
 from app.api.deps import get_db
-from app.services.url_service import get_url_by_code
-from app.services.cache_service import get_url_cache, set_url_cache, increment_url_clicks
+from app.services.url_service import get_url_redirect_info
+from app.services.cache_service import (
+    NOT_FOUND_SENTINEL,
+    get_url_cache,
+    set_url_cache,
+    set_url_not_found_cache,
+    increment_url_clicks,
+)
 from app.services import click_service
 from app.core.config import settings
 
@@ -32,19 +37,20 @@ async def redirect_to_url(
       The app does not crash; redirects work but are slower.
 
     Flow:
-    1. Try to get URL from Redis cache (optional fast-path check).
+    1. Try to get URL from Redis cache (optional fast-path check); a cached
+       "not found" sentinel returns 404 immediately.
     2. Always get from database (need url_id for click tracking + expires_at for expiration check).
-    3. Check if URL exists (404 if not).
+    3. Check if URL exists (404 if not, and cache the miss for a short TTL).
     4. Check if URL has expired (410 if expired).
-    5. Optionally cache for next time if MISS (on error → skip, redirect still works).
-    6. Track click in Postgres via background task (runs after response is sent).
-    7. Increment click counter in Redis (fire-and-forget).
+    5. Cache for next time if MISS via background task (on error → skip, redirect still works).
+    6. Track click in Postgres (queued, inserted in batches off the request path).
+    7. Increment click counter in Redis (buffered in-process, flushed in batches).
     8. Return 307 redirect to target URL.
 
     Args:
         short_code: The short code to redirect
         request: FastAPI Request (for client IP)
-        background_tasks: FastAPI BackgroundTasks (for async click tracking)
+        background_tasks: FastAPI BackgroundTasks (for cache writes)
         db: Database session
         
     Returns:
@@ -69,57 +75,49 @@ async def redirect_to_url(
     cache_hit = cached_url is not None
     db_query_ms: float | None = None
 
+    # Known miss (negative cache) → 404 without touching Postgres
+    if cached_url == NOT_FOUND_SENTINEL:
+        timestamps["end"] = time.perf_counter()
+        _log_redirect_latency(short_code, cache_hit, timestamps, db_query_ms)
+        raise _not_found(short_code)
+
     # 2. Always get from database (need url_obj.id for click tracking + expiration check)
     t_before_db = time.perf_counter()
-    url_obj = await get_url_by_code(short_code, db)
+    url_obj = await get_url_redirect_info(short_code, db)
     timestamps["after_db_query"] = time.perf_counter()
     db_query_ms = (timestamps["after_db_query"] - t_before_db) * 1000
 
-    # 3. Check if URL exists
+    # 3. Check if URL exists (remember the miss so repeated lookups skip Postgres)
     if not url_obj:
+        try:
+            await set_url_not_found_cache(short_code)
+        except Exception:
+            pass  # Degraded mode: don't fail the redirect
+        timestamps["end"] = time.perf_counter()
+        _log_redirect_latency(short_code, cache_hit, timestamps, db_query_ms)
+        raise _not_found(short_code)
+
+    # 4. Check if URL has expired (compared against now() in the query itself)
+    if url_obj.is_expired:
         timestamps["end"] = time.perf_counter()
         _log_redirect_latency(short_code, cache_hit, timestamps, db_query_ms)
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Short code '{short_code}' not found"
+            status_code=status.HTTP_410_GONE,
+            detail=f"This short URL expired on {url_obj.expires_at.isoformat()}"
         )
 
-    # 4. Check if URL has expired
-    if url_obj.expires_at:
-        now = datetime.now(timezone.utc)
-        expires_at = url_obj.expires_at
-        if expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-        if expires_at <= now:
-            timestamps["end"] = time.perf_counter()
-            _log_redirect_latency(short_code, cache_hit, timestamps, db_query_ms)
-            raise HTTPException(
-                status_code=status.HTTP_410_GONE,
-                detail=f"This short URL expired on {expires_at.isoformat()}"
-            )
-
     target_url = url_obj.target_url
 
-    # 5. Cache for next time if it was a MISS. On Redis failure → skip cache, redirect still works.
+    # 5. Cache for next time if it was a MISS (background task - runs after response is sent).
+    #    On Redis failure → skip cache, redirect still works.
     if not cache_hit:
-        try:
-            await set_url_cache(short_code, target_url, settings.CACHE_TTL_SECONDS)
-        except Exception:
-            pass  # Degraded mode: don't fail the redirect
+        background_tasks.add_task(_cache_url_safely, short_code, target_url)
 
-    # 6. Track click in Postgres (background task - runs after response is sent)
-    background_tasks.add_task(
-        click_service.track_click,
-        url_id=url_obj.id,
-        ip_address=request.client.host
-    )
+    # 6. Track click in Postgres (queued in-process, inserted in batches)
+    click_service.track_click(url_id=url_obj.id, ip_address=request.client.host)
 
-    # 7. Increment click counter in Redis (fire-and-forget)
-    try:
-        await increment_url_clicks(short_code)
-    except Exception:
-        pass
+    # 7. Increment click counter in Redis (buffered, no round trip on the request path)
+    increment_url_clicks(short_code)
 
     timestamps["end"] = time.perf_counter()
     _log_redirect_latency(short_code, cache_hit, timestamps, db_query_ms)
@@ -128,6 +126,21 @@ async def redirect_to_url(
     return RedirectResponse(url=target_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
 
+def _not_found(short_code: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Short code '{short_code}' not found"
+    )
+
+
+async def _cache_url_safely(short_code: str, target_url: str) -> None:
+    """Populate the cache after a MISS; errors are logged, never raised (degraded mode)."""
+    try:
+        await set_url_cache(short_code, target_url, settings.CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Error caching URL for '{short_code}': {e}")
+
+
 def _log_redirect_latency(
     short_code: str,
     cache_hit: bool,
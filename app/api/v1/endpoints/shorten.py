@@ -1,28 +1,37 @@
-from fastapi import APIRouter
+import httpx
+from fastapi import APIRouter, BackgroundTasks
 from app.schemas.url import URLCreate, URLResponse
 from app.services.url_service import create_short_url
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, status
 from app.api.deps import get_db
+from app.core.http_client import get_http_client
 from app.core.exceptions import URLShortenerException
 from fastapi import HTTPException
 
 router = APIRouter()
 
 @router.post("/shorten", response_model=URLResponse, status_code=status.HTTP_201_CREATED)
-async def shorten_url(url: URLCreate, db: AsyncSession = Depends(get_db)):
+async def shorten_url(
+    url: URLCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    http_client: httpx.AsyncClient = Depends(get_http_client),
+):
     """
     Shorten a URL.
 
     Args:
         url: The URL to shorten.
+        background_tasks: Runs the cache write after the response is sent.
         db: The database session.
+        http_client: Shared HTTP client used to check the URL is reachable.
 
     Returns:
         The shortened URL.
     """
     try:
-        return await create_short_url(url, db)
+        return await create_short_url(url, db, http_client, background_tasks)
     except URLShortenerException as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
     except Exception as e:
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -17,13 +18,46 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    SQL_ECHO: bool = False  # Log every SQL statement (costly; independent of DEBUG)
 
     DATABASE_URL: str
     REDIS_URL: str
 
+    #database pool
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT_SECONDS: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # 30 minutes
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Server-side statement_timeout (Postgres)
+    DB_POOL_PER_WORKER: bool = False  # Treat pool sizes as totals split across WEB_CONCURRENCY workers
+    WEB_CONCURRENCY: int = 1  # Worker processes (also read by uvicorn for --workers)
+
     #redis
     REDIS_MAX_CONNECTIONS: int = 10
     CACHE_TTL_SECONDS: int = 86400  # 24 hours
+    NEGATIVE_CACHE_TTL_SECONDS: int = 60  # Unknown codes; short so new codes resolve quickly
+    UNREACHABLE_CACHE_TTL_SECONDS: int = 60  # Target URLs that failed the reachability probe
+    CLICK_FLUSH_INTERVAL_SECONDS: float = 0.1  # Batch Redis click counters
+
+    #url creation
+    URL_FAST_NORMALIZE: bool = True  # String-op normalization; False uses the urlparse reference path
+
+    #click tracking
+    CLICK_BATCH_SIZE: int = 500  # Max clicks per INSERT
+    CLICK_BATCH_MAX_WAIT_SECONDS: float = 0.05  # Max time to fill a batch
+    CLICK_QUEUE_MAX_SIZE: int = 10000  # Clicks beyond this are dropped (logged)
+
+    # Analytics
+    ANALYTICS_USE_HLL: bool = False  # Approximate unique visitors (requires Postgres hll extension)
+    ANALYTICS_USE_ROLLUP: bool = False  # Serve analytics from clicks_daily (requires hll extension)
+    ANALYTICS_ROLLUP_REFRESH_SECONDS: int = 3600  # 1 hour
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build Settings once per process (parses .env and validates only on first call)."""
+    return Settings()
+
 
 # Singleton pattern - single instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
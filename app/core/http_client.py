@@ -0,0 +1,53 @@
+import httpx
+
+from app.core.config import settings
+
+# Set once on the client so requests don't each carry their own User-Agent
+_DEFAULT_HEADERS = {"User-Agent": f"urlshort/{settings.VERSION}"}
+
+# Shared client (keep-alive connection pool per process), created on first use
+_http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a new async HTTP client for outbound URL checks.
+
+    Probes go through client.stream() and only look at the status code, so
+    a server that ignores Range never has its body downloaded.
+
+    Returns:
+        httpx.AsyncClient: Client with its own connection pool
+    """
+    return httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=30),
+        http2=False,  # Probes are tiny one-shot requests: no use for h2 multiplexing
+        follow_redirects=True,
+        headers=_DEFAULT_HEADERS,
+    )
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client, creating it on first use.
+
+    The client is normally created at startup (FastAPI lifespan) so requests
+    reuse pooled keep-alive connections instead of a new TCP/TLS handshake
+    per call. Also usable as a FastAPI dependency.
+
+    Returns:
+        httpx.AsyncClient: Shared async HTTP client
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
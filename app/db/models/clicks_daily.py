@@ -0,0 +1,15 @@
+from sqlalchemy import Date, DateTime, Integer, table, column
+from sqlalchemy.types import NullType
+
+# Daily click rollup, a Postgres materialized view (see the add_clicks_daily
+# migration). Not part of Base.metadata: it is created by migrations only and
+# refreshed by click_service.run_clicks_daily_refresher().
+clicks_daily = table(
+    "clicks_daily",
+    column("url_id", Integer),
+    column("click_date", Date),
+    column("clicks", Integer),
+    column("first_click", DateTime(timezone=True)),
+    column("last_click", DateTime(timezone=True)),
+    column("visitors", NullType),  # hll sketch of ip_address
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy import Column, Index, String, DateTime, Integer
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
@@ -6,8 +6,18 @@ class URL(Base):
     __tablename__ = "urls"
     
     id = Column(Integer, primary_key=True, index=True)
-    short_code = Column(String(10), unique=True, index=True, nullable=False)
+    short_code = Column(String(32), nullable=False)  # Unique via ix_urls_short_code_cov
     target_url = Column(String(2048), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)  # None = never expires
-    
\ No newline at end of file
+
+    __table_args__ = (
+        # Covering index: the redirect lookup is answered by an index-only scan
+        Index(
+            "ix_urls_short_code_cov",
+            "short_code",
+            unique=True,
+            postgresql_include=["id", "target_url", "expires_at"],
+        ),
+    )
+    
@@ -1,15 +1,45 @@
 from redis.asyncio import Redis
 from app.core.config import settings
 
-def get_redis_client() -> Redis:
+# Shared client (one connection pool per process), created on first use
+_redis: Redis | None = None
+
+
+def create_redis_client() -> Redis:
     """
-    Create and return a Redis client connection.
-    
+    Create a new Redis client with its own connection pool.
+
     Returns:
         Redis: Redis async client instance
     """
     return Redis.from_url(
         settings.REDIS_URL,
         decode_responses=True,  # Auto-decode bytes to strings
-        max_connections=settings.REDIS_MAX_CONNECTIONS
-    )
\ No newline at end of file
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        health_check_interval=30,
+    )
+
+
+async def get_redis() -> Redis:
+    """
+    Return the shared Redis client, creating it on first use.
+
+    The client is normally created at startup (FastAPI lifespan) and shared
+    by every cache operation, so requests reuse pooled connections instead
+    of building a new pool per call.
+
+    Returns:
+        Redis: Shared Redis async client instance
+    """
+    global _redis
+    if _redis is None:
+        _redis = create_redis_client()
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client and release its connection pool."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
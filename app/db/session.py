@@ -1,12 +1,50 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from app.core.config import settings
 
+
+def _engine_options(database_url: str) -> dict:
+    """
+    Pool and connection options for the configured database.
+
+    Postgres gets an explicitly sized AsyncAdaptedQueuePool (the defaults of
+    5 + 10 overflow exhaust quickly under concurrent load) and a server-side
+    statement_timeout. With DB_POOL_PER_WORKER the configured sizes are a
+    budget for the whole deployment, divided across WEB_CONCURRENCY worker
+    processes so adding workers does not multiply Postgres connections.
+    SQLite (local/tests) keeps SQLAlchemy's defaults, which do not accept
+    pool sizing.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_POOL_PER_WORKER:
+        workers = max(settings.WEB_CONCURRENCY, 1)
+        pool_size = max(pool_size // workers, 1)
+        max_overflow = max_overflow // workers
+    options = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
 # Create engine (DB connection)
-# check_same_thread=False is for SQLite only, does not affect Postgres
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,  # Log SQL queries in development
-    future=True
+    echo=settings.SQL_ECHO,  # Opt-in SQL logging, not tied to DEBUG
+    future=True,
+    **_engine_options(settings.DATABASE_URL),
 )
 
 # Session factory - create sessions per request
@@ -22,4 +60,4 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
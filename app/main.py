@@ -1,20 +1,61 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
+from app.core.exceptions import CacheError
 from app.db.session import get_db
 from app.db.models.url import URL
+from app.db.redis import get_redis, close_redis
+from app.core.http_client import get_http_client, close_http_client
+from app.services.cache_service import run_click_flusher, flush_url_clicks
+from app.services.click_service import run_clicks_daily_refresher, run_click_writer, flush_clicks
 from app.api.v1.router import api_router
 from app.api.v1.endpoints import redirect
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and release them on shutdown."""
+    await get_redis()
+    await get_http_client()
+    background = [
+        asyncio.create_task(run_click_flusher(settings.CLICK_FLUSH_INTERVAL_SECONDS)),
+        asyncio.create_task(
+            run_click_writer(settings.CLICK_BATCH_SIZE, settings.CLICK_BATCH_MAX_WAIT_SECONDS)
+        ),
+    ]
+    if settings.ANALYTICS_USE_ROLLUP:
+        background.append(
+            asyncio.create_task(run_clicks_daily_refresher(settings.ANALYTICS_ROLLUP_REFRESH_SECONDS))
+        )
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await flush_clicks()
+    # Flush clicks recorded since the last tick before closing Redis
+    try:
+        await flush_url_clicks()
+    except CacheError:
+        pass
+    await close_redis()
+    await close_http_client()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson: C-level JSON encoding
 )
 
 # Include API routes with /api/v1 prefix
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 # Include redirect router at root level (for short URLs like /{short_code})
-app.include_router(redirect.router, tags=["redirect"])
\ No newline at end of file
+app.include_router(redirect.router, tags=["redirect"])
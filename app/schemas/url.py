@@ -1,6 +1,6 @@
 from pydantic import BaseModel, HttpUrl, Field, field_validator, ConfigDict
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 class URLCreate(BaseModel):
     url: HttpUrl = Field(...,max_length=2048, description="The URL to shorten")
@@ -11,8 +11,9 @@ class URLCreate(BaseModel):
     @classmethod
     def validate_expires_at(cls, v: Optional[datetime]) -> Optional[datetime]:
         if v is not None:
-            now = datetime.now(v.tzinfo) if v.tzinfo else datetime.now()
-            if v <= now:
+            # Normalize to UTC-aware (naive input is taken as UTC)
+            v = v.replace(tzinfo=timezone.utc) if v.tzinfo is None else v.astimezone(timezone.utc)
+            if v <= datetime.now(timezone.utc):
                 raise ValueError("Expiration date must be in the future")
         return v
 
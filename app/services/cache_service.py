@@ -1,8 +1,39 @@
+import asyncio
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from hashlib import blake2b
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
 from app.core.config import settings
-from app.db.redis import get_redis_client
+from app.db.redis import get_redis
+from app.utils.code_generator import is_short_code
 from app.core.exceptions import CacheError
 
+logger = logging.getLogger(__name__)
+
+# Cached in place of a target URL for codes known not to exist
+NOT_FOUND_SENTINEL = "__NF__"
+
+# Keys that are not URL mappings: click counters and reachability entries
+CLICKS_KEY_PREFIX = "clicks:"
+REACHABILITY_KEY_PREFIX = "url:reach:"
+
+# GET a key and reset its TTL, unless it holds the not-found sentinel
+_GET_AND_TOUCH_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and value ~= ARGV[2] then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return value
+"""
+
+# _GET_AND_TOUCH_SCRIPT registered on the current shared client
+_get_and_touch: AsyncScript | None = None
+
+# Click counts waiting to be flushed to Redis (short_code -> clicks)
+_pending_clicks: defaultdict[str, int] = defaultdict(int)
+
 
 async def set_url_cache(short_code: str, target_url: str, ttl: int = None):
     """
@@ -14,7 +45,7 @@ async def set_url_cache(short_code: str, target_url: str, ttl: int = None):
         ttl: Time to live in seconds (defaults to settings.CACHE_TTL_SECONDS)
     """
     try:
-        redis_client = get_redis_client()
+        redis_client = await get_redis()
         if ttl is None:
             ttl = settings.CACHE_TTL_SECONDS
         await redis_client.set(short_code, target_url, ex=ttl)
@@ -22,19 +53,62 @@ async def set_url_cache(short_code: str, target_url: str, ttl: int = None):
         raise CacheError(f"Error setting URL cache: {e}")
 
 
-async def get_url_cache(short_code: str) -> str | None:
+async def set_url_not_found_cache(short_code: str, ttl: int = None):
     """
-    Retrieve a URL from Redis cache.
-    
+    Remember that a short code does not exist (negative cache).
+
+    Stored with NX so it never overwrites a real mapping, and with a short TTL
+    so newly created codes become resolvable quickly (creating a code also
+    overwrites the sentinel via set_url_cache).
+
+    Args:
+        short_code: The short code key
+        ttl: Time to live in seconds (defaults to settings.NEGATIVE_CACHE_TTL_SECONDS)
+    """
+    if not is_short_code(short_code):
+        return  # Could name another key (clicks:*, url:reach:*); no mapping can exist
+    try:
+        redis_client = await get_redis()
+        if ttl is None:
+            ttl = settings.NEGATIVE_CACHE_TTL_SECONDS
+        await redis_client.set(short_code, NOT_FOUND_SENTINEL, ex=ttl, nx=True)
+    except Exception as e:
+        raise CacheError(f"Error setting URL not-found cache: {e}")
+
+
+def _get_and_touch_script(redis_client: Redis) -> AsyncScript:
+    """Return _GET_AND_TOUCH_SCRIPT registered on `redis_client`, registering it once per client."""
+    global _get_and_touch
+    if _get_and_touch is None or _get_and_touch.registered_client is not redis_client:
+        _get_and_touch = redis_client.register_script(_GET_AND_TOUCH_SCRIPT)
+    return _get_and_touch
+
+
+async def get_url_cache(short_code: str, ttl: int = None) -> str | None:
+    """
+    Retrieve a URL from Redis cache and refresh its TTL (LRU-like caching).
+
+    GET and EXPIRE run in one server-side script (single round trip), so hot
+    URLs stay cached while cold ones age out. The not-found sentinel keeps its
+    own short TTL. Codes outside the short-code alphabet are a MISS without
+    touching Redis, so a request path can never reset the TTL of a click
+    counter or reachability entry.
+
     Args:
         short_code: The short code to look up
+        ttl: New time to live in seconds (defaults to settings.CACHE_TTL_SECONDS)
         
     Returns:
-        The target URL if found, None otherwise
+        The target URL if found (NOT_FOUND_SENTINEL for a known miss), None otherwise
     """
+    if not is_short_code(short_code):
+        return None
     try:
-        redis_client = get_redis_client()
-        result = await redis_client.get(short_code)
+        redis_client = await get_redis()
+        if ttl is None:
+            ttl = settings.CACHE_TTL_SECONDS
+        get_and_touch = _get_and_touch_script(redis_client)
+        result = await get_and_touch(keys=[short_code], args=[ttl, NOT_FOUND_SENTINEL])
         return result
     except Exception as e:
         raise CacheError(f"Error getting URL cache: {e}")
@@ -48,26 +122,104 @@ async def delete_url_cache(short_code: str):
         short_code: The short code to delete
     """
     try:
-        redis_client = get_redis_client()
+        redis_client = await get_redis()
         await redis_client.delete(short_code)
     except Exception as e:
         raise CacheError(f"Error deleting URL cache: {e}")
 
 
-async def increment_url_clicks(short_code: str) -> int:
+def _reachability_key(target_url: str) -> str:
+    """Redis key of a target URL's reachability entry (fixed-size hash of the URL)."""
+    return REACHABILITY_KEY_PREFIX + blake2b(target_url.encode(), digest_size=16).hexdigest()
+
+
+async def set_url_unreachable_cache(target_url: str, ttl: int = None):
     """
-    Increment the click counter for a short code.
-    
+    Remember that a target URL failed the reachability probe (negative cache).
+
+    Only failures are cached: reachable URLs are the fast path, and a dead URL
+    resubmitted within the TTL is rejected without probing it again.
+
     Args:
-        short_code: The short code whose counter to increment
-        
+        target_url: The normalized target URL
+        ttl: Time to live in seconds (defaults to settings.UNREACHABLE_CACHE_TTL_SECONDS)
+    """
+    try:
+        redis_client = await get_redis()
+        if ttl is None:
+            ttl = settings.UNREACHABLE_CACHE_TTL_SECONDS
+        await redis_client.set(_reachability_key(target_url), "bad", ex=ttl)
+    except Exception as e:
+        raise CacheError(f"Error setting URL unreachable cache: {e}")
+
+
+async def is_url_unreachable_cached(target_url: str) -> bool:
+    """
+    Check whether a target URL recently failed the reachability probe.
+
+    Args:
+        target_url: The normalized target URL
+
     Returns:
-        The new click count
+        True if the URL is cached as unreachable, False otherwise
+    """
+    try:
+        redis_client = await get_redis()
+        return await redis_client.get(_reachability_key(target_url)) == "bad"
+    except Exception as e:
+        raise CacheError(f"Error getting URL unreachable cache: {e}")
+
+
+@lru_cache(maxsize=65536)
+def _clicks_key(short_code: str) -> str:
+    """Redis key of a short code's click counter (cached: hot codes reuse one string)."""
+    return CLICKS_KEY_PREFIX + short_code
+
+
+def increment_url_clicks(short_code: str) -> None:
     """
+    Record a click for a short code.
+
+    Clicks are aggregated in-process and written to Redis in batches by
+    flush_url_clicks(), so a redirect never waits on the counter.
+
+    Args:
+        short_code: The short code whose counter to increment
+    """
+    _pending_clicks[short_code] += 1
+
+
+async def flush_url_clicks() -> None:
+    """
+    Write aggregated click counts to Redis with one pipelined INCRBY per code.
+
+    Counts that fail to flush are dropped (the clicks table in Postgres is
+    the source of truth for analytics).
+    """
+    global _pending_clicks
+    if not _pending_clicks:
+        return
+    pending, _pending_clicks = _pending_clicks, defaultdict(int)
     try:
-        redis_client = get_redis_client()
-        clicks_key = f"clicks:{short_code}"
-        new_count = await redis_client.incr(clicks_key)
-        return new_count
+        redis_client = await get_redis()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for short_code, count in pending.items():
+                pipe.incrby(_clicks_key(short_code), count)
+            await pipe.execute()
     except Exception as e:
-        raise CacheError(f"Error incrementing URL clicks: {e}")
+        raise CacheError(f"Error flushing URL clicks: {e}")
+
+
+async def run_click_flusher(interval: float) -> None:
+    """
+    Flush aggregated click counts every `interval` seconds until cancelled.
+
+    Args:
+        interval: Seconds between flushes
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_url_clicks()
+        except CacheError as e:
+            logger.warning(str(e))
@@ -1,19 +1,128 @@
+import asyncio
 import logging
+import time
+from datetime import datetime, timezone
+from sqlalchemy import insert, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.db.models.click import Click
 from app.db.session import AsyncSessionLocal, get_db
 
 logger = logging.getLogger(__name__)
 
-async def track_click(url_id: int, ip_address: str) -> None:
-    """Track a click for a URL."""
+# Transaction-level advisory lock taken around each clicks_daily refresh, so
+# one worker per deployment refreshes on each tick
+_CLICKS_DAILY_REFRESH_LOCK = text("SELECT pg_try_advisory_xact_lock(hashtext('clicks_daily_refresh'))")
+
+# Clicks waiting to be inserted: (url_id, ip_address, created_at)
+_click_queue: asyncio.Queue[tuple[int, str, datetime]] = asyncio.Queue(maxsize=settings.CLICK_QUEUE_MAX_SIZE)
+
+def track_click(url_id: int, ip_address: str) -> None:
+    """
+    Track a click for a URL.
+
+    The click is queued in-process and inserted in batches by
+    run_click_writer(), so the redirect never waits on Postgres.
+    """
+    try:
+        _click_queue.put_nowait((url_id, ip_address, datetime.now(timezone.utc)))
+    except asyncio.QueueFull:
+        logger.error(f"Error tracking click: queue full, dropping click for url_id={url_id}")
+
+
+async def _write_clicks(batch: list[tuple[int, str, datetime]]) -> None:
+    """Insert a batch of queued clicks in one executemany round trip."""
     try:
         async with AsyncSessionLocal() as db:
-            click = Click(url_id=url_id, ip_address=ip_address)
-            db.add(click)
+            await db.execute(
+                insert(Click),
+                [
+                    {"url_id": url_id, "ip_address": ip_address, "created_at": created_at}
+                    for url_id, ip_address, created_at in batch
+                ],
+            )
             await db.commit()
-            await db.refresh(click)
-            return click
     except Exception as e:
-        logger.error(f"Error tracking click: {e}")
-        raise e
\ No newline at end of file
+        logger.error(f"Error tracking {len(batch)} clicks: {e}")
+
+
+async def run_click_writer(batch_size: int, max_wait: float) -> None:
+    """
+    Insert queued clicks until cancelled.
+
+    Each batch holds up to `batch_size` clicks, collected for at most
+    `max_wait` seconds after the first one arrives.
+
+    Args:
+        batch_size: Maximum clicks per INSERT
+        max_wait: Seconds to wait for a batch to fill
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _click_queue.get()]
+        try:
+            deadline = loop.time() + max_wait
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_click_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shutting down: don't lose clicks already taken off the queue
+            await _write_clicks(batch)
+            raise
+        write = asyncio.ensure_future(_write_clicks(batch))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # Cancelled mid-INSERT: let the write finish before exiting
+            await write
+            raise
+
+
+async def flush_clicks() -> None:
+    """Insert every click still queued (used on shutdown)."""
+    batch = []
+    while not _click_queue.empty():
+        batch.append(_click_queue.get_nowait())
+    if batch:
+        await _write_clicks(batch)
+
+
+async def refresh_clicks_daily() -> bool:
+    """
+    Refresh the clicks_daily rollup without blocking concurrent readers.
+
+    Skipped if another worker holds the refresh advisory lock.
+
+    Returns:
+        True if this call refreshed the view, False if another worker is refreshing it
+    """
+    async with AsyncSessionLocal() as db:
+        if not await db.scalar(_CLICKS_DAILY_REFRESH_LOCK):
+            return False
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY clicks_daily"))
+        await db.commit()
+    return True
+
+
+async def run_clicks_daily_refresher(interval: float) -> None:
+    """
+    Refresh the clicks_daily rollup now and then every `interval` seconds until cancelled.
+
+    Every worker process runs this task. Ticks fall on wall-clock multiples
+    of `interval`, so all workers wake together and the advisory lock in
+    refresh_clicks_daily() lets only one of them refresh.
+
+    Args:
+        interval: Seconds between refreshes
+    """
+    while True:
+        try:
+            await refresh_clicks_daily()
+        except Exception as e:
+            logger.error(f"Error refreshing clicks_daily: {e}")
+        await asyncio.sleep(interval - time.time() % interval)
@@ -1,11 +1,22 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
 from app.schemas.url import URLCreate, URLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import HTTPException
-from app.services.cache_service import set_url_cache
-from app.utils.code_generator import generate_code, is_valid_custom_code
+from fastapi import BackgroundTasks
+from app.services.cache_service import (
+    set_url_cache,
+    set_url_unreachable_cache,
+    is_url_unreachable_cached,
+)
+from app.utils.code_generator import generate_codes, is_valid_custom_code
 from app.db.models.url import URL
-from sqlalchemy import select
+from sqlalchemy import Row, and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import httpx
+from pydantic import HttpUrl
 from ipaddress import ip_address
 from urllib.parse import urlparse, urlunparse
 from app.core.config import settings
@@ -17,31 +28,170 @@ from app.core.exceptions import (
     CodeGenerationError,
     InvalidCustomCodeError,
     URLShortenerException,
-    URLNotFoundException
+    URLNotFoundException,
+    CacheError,
 )
 
-async def create_short_url(url: URLCreate, db: AsyncSession) -> URLResponse:
+logger = logging.getLogger(__name__)
+
+__all__ = ["create_short_url", "get_url_by_code", "get_url_redirect_info"]
+
+# Built once: settings are fixed for the process lifetime
+_SHORT_URL_PREFIX = settings.SHORT_URL_BASE.rstrip('/') + '/'
+
+# SSRF guard: hostnames rejected outright, and a cheap "could be an IP" gate
+_LOCAL_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
+_IP_LIKE = re.compile(r'^[0-9a-fA-F:.]+$')
+
+# Netlocs the string-op normalizer leaves to urlparse (userinfo, IPv6, query/fragment)
+_NEEDS_URLPARSE = re.compile(r'[@\[?#]')
+
+# Reachability probe: fetch at most one byte, with a tight timeout budget
+_PROBE_HEADERS = {"Range": "bytes=0-0"}
+_PROBE_TIMEOUT = httpx.Timeout(connect=3.0, read=5.0, write=3.0, pool=1.0)
+# httpx timeouts are per phase; this caps the whole probe, and with it how
+# long create_short_url keeps the uncommitted short code reserved
+_PROBE_DEADLINE = 8.0
+
+
+async def create_short_url(
+    url: URLCreate,
+    db: AsyncSession,
+    http_client: httpx.AsyncClient,
+    background_tasks: BackgroundTasks | None = None,
+) -> URLResponse:
 
     #1. Validate url
-    parsed = urlparse(str(url.url))
+    host, normalized = _normalize_url(str(url.url))
+
+    # Only parse hosts that look numeric: ip_address() raises (slowly) on names
+    ip = None
+    if _IP_LIKE.match(host):
+        try:
+            ip = ip_address(host)
+        except ValueError:
+            pass
+    if ip is not None:
+        if ip.is_private or ip.is_loopback or ip.is_link_local:
+            raise URLNotReachableException(details={"reason": "private IP"})
+    elif host in _LOCAL_HOSTS:
+        raise URLNotReachableException(details={"reason": "localhost"})
+
+    #2. Validate custom code format (no I/O)
+    if url.custom_code and not is_valid_custom_code(url.custom_code):
+        raise InvalidCustomCodeError(code=url.custom_code, reason="Invalid format")
+
+    # Skip the probe for URLs that just failed it (a Redis GET instead of up to
+    # several seconds of probing); a cache outage falls back to probing
+    try:
+        known_unreachable = await is_url_unreachable_cached(normalized)
+    except CacheError:
+        known_unreachable = False
+    if known_unreachable:
+        raise URLNotReachableException(details={"cached": True})
+
+    # Reachability probe and the short code reservation are independent I/O,
+    # so run them concurrently: latency is max(t_probe, t_db), not the sum.
+    # Trade-off: the INSERT's transaction (and its unique short_code entry)
+    # stays open until the probe returns, so a concurrent request for the same
+    # custom code waits on it for at most _PROBE_DEADLINE; a failed probe
+    # rolls back and frees the code right away
+    probe, row = await asyncio.gather(
+        _probe_url(str(url.url), http_client),
+        _insert_new_url(url, normalized, db),
+        return_exceptions=True,
+    )
+    if isinstance(probe, URLNotReachableException):
+        try:
+            await set_url_unreachable_cache(normalized)
+        except CacheError:
+            pass
+    for outcome in (probe, row):
+        if isinstance(outcome, BaseException):
+            # Release the reserved short code; nothing has been committed yet
+            await db.rollback()
+            raise outcome
+
+    #3. Commit the new URL
+    await db.commit()
+
+    #4. Set URL cache (after the response is sent when called from a route)
+    if background_tasks is not None:
+        background_tasks.add_task(_cache_url_safely, row.short_code, row.target_url)
+    else:
+        await set_url_cache(row.short_code, row.target_url, settings.CACHE_TTL_SECONDS)
+
+    # Built straight from the RETURNING row: no refresh SELECT after commit.
+    # Every value is DB-originated or server-built, so skip validation; FastAPI
+    # does not re-validate returned models, so target_url must already be an
+    # HttpUrl to serialize the same way as a validated URLResponse
+    return URLResponse.model_construct(
+        id=row.id,
+        short_code=row.short_code,
+        target_url=HttpUrl(row.target_url),
+        short_url=_SHORT_URL_PREFIX + row.short_code,
+        created_at=row.created_at,
+        clicks=0,
+    )
+
+
+def _normalize_url(raw_url: str) -> tuple[str, str]:
+    """
+    Normalize a URL: lowercase netloc, drop a leading "www." and trailing "/" of the path.
+
+    Uses plain string splitting; URLs with userinfo, IPv6 hosts or path
+    params fall back to the urlparse implementation, as does every URL when
+    settings.URL_FAST_NORMALIZE is off.
+
+    Args:
+        raw_url: The validated URL string
+
+    Returns:
+        Tuple of (lowercased host without port, normalized URL)
+
+    Raises:
+        InvalidURLException: If the URL has no scheme or netloc
+    """
+    if not settings.URL_FAST_NORMALIZE:
+        return _normalize_url_urlparse(raw_url)
+
+    scheme, _, rest = raw_url.partition('://')
+    netloc, _, tail = rest.partition('/')
+    if not scheme or not netloc or _NEEDS_URLPARSE.search(netloc) or ';' in tail:
+        return _normalize_url_urlparse(raw_url)
+
+    netloc = netloc.lower()
+    host = netloc.split(':')[0]
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+
+    # Only the path loses its trailing slash, not the query or fragment
+    end = len(tail)
+    for sep in '?#':
+        i = tail.find(sep, 0, end)
+        if i != -1:
+            end = i
+    path = tail[:end].rstrip('/')
+    if path:
+        path = '/' + path
+    # Like urlunparse, drop an empty query or fragment along with its separator
+    query, _, fragment = tail[end:].partition('#')
+    query = query[1:]
+    if query:
+        path += '?' + query
+    if fragment:
+        path += '#' + fragment
+    return host, f"{scheme}://{netloc}{path}"
+
+
+def _normalize_url_urlparse(raw_url: str) -> tuple[str, str]:
+    """Reference implementation of _normalize_url built on urlparse/urlunparse."""
+    parsed = urlparse(raw_url)
 
     if not parsed.scheme or not parsed.netloc:
         raise InvalidURLException()
-    try:
-        response = httpx.head(str(url.url), follow_redirects=True, timeout=10)
-        if response.status_code != 200:
-            raise URLNotReachableException(details={"status_code": response.status_code})
-    except httpx.RequestError as e:
-        raise URLNotReachableException(details={"error": str(e)})
 
-    host = parsed.netloc.split(':')[0]
-    try:
-        ip = ip_address(host)
-        if ip.is_private or ip.is_loopback or ip.is_link_local:
-            raise URLNotReachableException(details={"reason": "private IP"})
-    except ValueError:
-        if host.lower() in ('localhost', '127.0.0.1', '::1'):
-            raise URLNotReachableException(details={"reason": "localhost"})
+    host = parsed.netloc.split(':')[0].lower()
 
     netloc = parsed.netloc.lower()
     if netloc.startswith('www.'):
@@ -51,47 +201,115 @@ async def create_short_url(url: URLCreate, db: AsyncSession) -> URLResponse:
     path = parsed.path.rstrip('/') or ''
 
     normalized = urlunparse((parsed.scheme, netloc, path, parsed.params, parsed.query, parsed.fragment))
+    return host, normalized
+
+
+async def _cache_url_safely(short_code: str, target_url: str) -> None:
+    """Populate the cache for a new URL; errors are logged, never raised (degraded mode)."""
+    try:
+        await set_url_cache(short_code, target_url, settings.CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Error caching URL for '{short_code}': {e}")
 
-    #2. Validate custom code
 
+async def _probe_url(target_url: str, http_client: httpx.AsyncClient) -> None:
+    """
+    Check that a URL is reachable with a single-byte ranged GET.
+
+    A ranged GET is used instead of HEAD because many CDNs reject HEAD
+    (403/405) for URLs that work fine. The response is streamed and its
+    body never read, so servers that ignore Range and answer 200 with the
+    full body cost no download. Any 2xx (incl. 206) or 3xx counts as
+    reachable.
+
+    Args:
+        target_url: URL to probe
+        http_client: Shared HTTP client
+
+    Raises:
+        URLNotReachableException: On timeout, connection failure or error status
+    """
+    try:
+        status_code = await asyncio.wait_for(_probe_status(target_url, http_client), _PROBE_DEADLINE)
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+        raise URLNotReachableException(details={"error": "timeout", "detail": str(e)})
+    except httpx.ConnectError as e:
+        raise URLNotReachableException(details={"error": "connection failed", "detail": str(e)})
+    except httpx.RequestError as e:
+        raise URLNotReachableException(details={"error": str(e)})
+    if not 200 <= status_code < 400:
+        raise URLNotReachableException(details={"status_code": status_code})
+
+
+async def _probe_status(target_url: str, http_client: httpx.AsyncClient) -> int:
+    """Return the probe's status code without reading the body (servers may ignore Range)."""
+    async with http_client.stream("GET", target_url, headers=_PROBE_HEADERS, timeout=_PROBE_TIMEOUT) as response:
+        return response.status_code
+
+
+async def _insert_new_url(url: URLCreate, target_url: str, db: AsyncSession) -> Row:
+    """
+    Insert the URL under its custom code, or under the first free generated code.
+
+    Each attempt is a single INSERT ... ON CONFLICT (short_code) DO NOTHING
+    RETURNING, so the uniqueness check and the write are one atomic round-trip
+    and the unique short_code index settles races between concurrent requests.
+
+    Args:
+        url: URL creation request
+        target_url: Normalized target URL
+        db: Database session
+
+    Returns:
+        Row with id, short_code, target_url and created_at of the inserted URL
+
+    Raises:
+        CustomCodeAlreadyExistsException: If the custom code is taken
+        CodeGenerationError: If every generated code is taken
+    """
     if url.custom_code:
-        if not is_valid_custom_code(url.custom_code):
-            raise InvalidCustomCodeError(code=url.custom_code, reason="Invalid format")
-        existing_url = await db.execute(select(URL).where(URL.short_code == url.custom_code))
-        if existing_url.scalar_one_or_none():
+        row = await _insert_url_if_code_free(url.custom_code, target_url, url.expires_at, db)
+        if row is None:
             raise CustomCodeAlreadyExistsException(code=url.custom_code)
-    else:
-        for _ in range(3):
-            code = generate_code()
-            if is_valid_custom_code(code):
-                existing_url = await db.execute(select(URL).where(URL.short_code == code))
-                if not existing_url.scalar_one_or_none():
-                    url.custom_code = code
-                    break
-        else:
-            raise CodeGenerationError(retries=3)
-    
-    #3. Create URL in the database
-    new_url = URL(
-        short_code=url.custom_code,
-        target_url=normalized,
-        expires_at=url.expires_at  # Can be None (never expires)
-    )
-    db.add(new_url)
-    await db.commit()
-    await db.refresh(new_url)
-
-    #4. Set URL cache
-    await set_url_cache(new_url.short_code, new_url.target_url, settings.CACHE_TTL_SECONDS)
-
-    return URLResponse(
-        id=new_url.id,
-        short_code=new_url.short_code,
-        target_url=new_url.target_url,
-        short_url=f"{settings.SHORT_URL_BASE}/{new_url.short_code}",
-        created_at=new_url.created_at,
-        clicks=0
+        return row
+
+    # All candidates come from a single random read
+    for code in generate_codes(3):
+        if not is_valid_custom_code(code):
+            continue
+        row = await _insert_url_if_code_free(code, target_url, url.expires_at, db)
+        if row is not None:
+            return row
+    raise CodeGenerationError(retries=3)
+
+
+async def _insert_url_if_code_free(
+    short_code: str, target_url: str, expires_at: datetime | None, db: AsyncSession
+) -> Row | None:
+    """
+    Insert a URL row unless short_code already exists.
+
+    Args:
+        short_code: Short code to claim
+        target_url: Normalized target URL
+        expires_at: Expiration time, None for never
+        db: Database session
+
+    Returns:
+        Row with id, short_code, target_url and created_at (server default)
+        if inserted, None if short_code is taken
+    """
+    # ON CONFLICT is dialect-specific; SQLite is only used by the test suite
+    bind = db.bind
+    insert = sqlite_insert if bind is not None and bind.dialect.name == "sqlite" else pg_insert
+    stmt = (
+        insert(URL)
+        .values(short_code=short_code, target_url=target_url, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["short_code"])
+        .returning(URL.id, URL.short_code, URL.target_url, URL.created_at)
     )
+    result = await db.execute(stmt)
+    return result.first()
 
 
 async def get_url_by_code(short_code: str, db: AsyncSession) -> URL | None:
@@ -106,4 +324,31 @@ async def get_url_by_code(short_code: str, db: AsyncSession) -> URL | None:
         URL model if found, None otherwise
     """
     result = await db.execute(select(URL).where(URL.short_code == short_code))
-    return result.scalar_one_or_none()
\ No newline at end of file
+    return result.scalar_one_or_none()
+
+
+async def get_url_redirect_info(short_code: str, db: AsyncSession) -> Row | None:
+    """
+    Get only the columns the redirect needs for a short code.
+
+    Selects id, target_url and expires_at as a plain row (no ORM instance,
+    no identity-map tracking). Expiry is evaluated by the database against
+    now(), so callers only branch on is_expired.
+
+    Args:
+        short_code: The short code to look up
+        db: Database session
+
+    Returns:
+        Row with id, target_url, expires_at, is_expired if found, None otherwise
+    """
+    is_expired = and_(URL.expires_at.is_not(None), URL.expires_at <= func.now())
+    result = await db.execute(
+        select(
+            URL.id,
+            URL.target_url,
+            URL.expires_at,
+            is_expired.label("is_expired"),
+        ).where(URL.short_code == short_code)
+    )
+    return result.first()
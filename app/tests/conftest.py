@@ -0,0 +1,10 @@
+import pytest_asyncio
+
+from app.db.redis import close_redis
+
+
+@pytest_asyncio.fixture(autouse=True, loop_scope="module")
+async def reset_redis_client():
+    """Close the shared Redis client after each test (async tests share a module event loop)."""
+    yield
+    await close_redis()
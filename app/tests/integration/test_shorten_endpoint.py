@@ -1,81 +1,104 @@
+import httpx
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import select
-from unittest.mock import patch, MagicMock
+from sqlalchemy import event, select
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.db.base_class import Base
 from app.db.models.url import URL
 from app.api.deps import get_db
+from app.core.http_client import get_http_client
 
 
 # In-memory test database URL (SQLite)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
 async def test_engine():
-    """Create test database engine."""
+    """Create the test database engine once per module."""
+    # StaticPool: every session shares the one connection holding the in-memory DB
     engine = create_async_engine(
         TEST_DATABASE_URL,
-        echo=False,
-        future=True,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
     )
 
+    # pysqlite defers BEGIN, which breaks SAVEPOINT; emit it ourselves
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     yield engine
 
-    # Cleanup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    # The in-memory database goes away with its connection
     await engine.dispose()
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(loop_scope="module")
 async def db_session(test_engine):
-    """Create a test database session."""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
+    """Create a per-test session whose writes are rolled back afterwards."""
+    async with test_engine.connect() as conn:
+        await conn.begin()
+        # Service commits only release a SAVEPOINT inside the outer transaction
+        async_session = async_sessionmaker(
+            bind=conn,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+        async with async_session() as session:
+            yield session
+
+        await conn.rollback()
 
-    async with async_session() as session:
-        yield session
 
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def asgi_client():
+    """Create one test client per module; per-test fixtures install the overrides."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as ac:
+        yield ac
 
-@pytest_asyncio.fixture
-async def client(db_session):
-    """Create test client with database override."""
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def client(asgi_client, db_session):
+    """Return the module test client with database override."""
     
     async def override_get_db():
         yield db_session
     
-    # Override dependency
+    # Mock shared HTTP client so reachability probes do not make real calls
+    mock_http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    async def override_get_http_client():
+        return mock_http_client
+
+    # Override dependencies
     app.dependency_overrides[get_db] = override_get_db
-    
-    # Mock httpx.head so it does not make real calls
-    with patch("app.services.url_service.httpx.head") as mock_head:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_head.return_value = mock_response
-        
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test"
-        ) as ac:
-            yield ac
+    app.dependency_overrides[get_http_client] = override_get_http_client
+
+    yield asgi_client
     
     # Clear override
     app.dependency_overrides.clear()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_post_valid_url_returns_201(client):
     """Test: POST with valid URL returns 201."""
     response = await client.post(
@@ -88,9 +111,10 @@ async def test_post_valid_url_returns_201(client):
     assert "short_code" in data
     assert "short_url" in data
     assert data["id"] is not None
+    assert data["target_url"] == "https://google.com/"
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_response_has_correct_fields(client):
     """Test: Response has correct fields."""
     response = await client.post(
@@ -117,7 +141,7 @@ async def test_response_has_correct_fields(client):
     assert data["short_code"] in data["short_url"]
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_custom_code_is_respected(client):
     """Test: Custom code is respected."""
     response = await client.post(
@@ -134,7 +158,7 @@ async def test_custom_code_is_respected(client):
     assert "my-custom" in data["short_url"]
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_duplicate_custom_code_returns_409(client):
     """Test: Duplicate custom code returns 409."""
     # Create first URL
@@ -161,7 +185,7 @@ async def test_duplicate_custom_code_returns_409(client):
     assert "already exists" in response2.json()["detail"].lower() or "duplicate" in response2.json()["detail"].lower()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_url_without_protocol_returns_422(client):
     """Test: URL without protocol returns 422 (Pydantic validation error)."""
     response = await client.post(
@@ -175,7 +199,7 @@ async def test_url_without_protocol_returns_422(client):
     assert "detail" in data
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_verify_url_saved_in_db(client, db_session):
     """Test: Verify that URL is saved in DB."""
     # Create URL via endpoint
@@ -1,74 +1,87 @@
+import httpx
 import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import select
-from unittest.mock import patch, MagicMock
+from sqlalchemy import event, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import AsyncMock, patch
 from datetime import datetime
 
 from app.db.base_class import Base
 from app.db.models.url import URL
 from app.services.url_service import create_short_url
 from app.schemas.url import URLCreate
-from app.core.exceptions import CustomCodeAlreadyExistsException
+from app.core.exceptions import CustomCodeAlreadyExistsException, URLNotReachableException
 
 
 # In-memory test database URL (SQLite)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
 async def test_engine():
-    """Create test database engine."""
+    """Create the test database engine once per module."""
+    # StaticPool: every session shares the one connection holding the in-memory DB
     engine = create_async_engine(
         TEST_DATABASE_URL,
-        echo=False,
-        future=True,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
     )
 
+    # pysqlite defers BEGIN, which breaks SAVEPOINT; emit it ourselves
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     yield engine
 
-    # Cleanup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    # The in-memory database goes away with its connection
     await engine.dispose()
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(loop_scope="module")
 async def db_session(test_engine):
-    """Create a test database session."""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
+    """Create a per-test session whose writes are rolled back afterwards."""
+    async with test_engine.connect() as conn:
+        await conn.begin()
+        # Service commits only release a SAVEPOINT inside the outer transaction
+        async_session = async_sessionmaker(
+            bind=conn,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+        async with async_session() as session:
+            yield session
 
-    async with async_session() as session:
-        yield session
+        await conn.rollback()
 
 
 @pytest.fixture
 def mock_httpx_success():
-    """Mock successful httpx HEAD request."""
-    with patch("app.services.url_service.httpx.head") as mock_head:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_head.return_value = mock_response
-        yield mock_head
+    """Mock shared HTTP client whose reachability probe succeeds."""
+    # Real client over an in-process transport: the probe's stream() runs as in production
+    return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_create_url_end_to_end_with_test_database(db_session, mock_httpx_success):
     """Test: Create URL end-to-end with test database."""
     # Create request
     url_data = URLCreate(url="https://example.com")
 
-    # Mock generate_code for predictable code
-    with patch("app.services.url_service.generate_code", return_value="test123"):
-        result = await create_short_url(url_data, db_session)
+    # Mock generate_codes for predictable code
+    with patch("app.services.url_service.generate_codes", return_value=["test123"]):
+        result = await create_short_url(url_data, db_session, mock_httpx_success)
 
     # Assert response
     assert result.short_code == "test123"
@@ -77,13 +90,13 @@ async def test_create_url_end_to_end_with_test_database(db_session, mock_httpx_s
     assert result.created_at is not None
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_verify_url_saved_in_db(db_session, mock_httpx_success):
     """Test: Verify that URL is saved in DB."""
     # Create URL
     url_data = URLCreate(url="https://google.com", custom_code="mylink")
 
-    result = await create_short_url(url_data, db_session)
+    result = await create_short_url(url_data, db_session, mock_httpx_success)
 
     # Assert it exists in DB
     query_result = await db_session.execute(
@@ -97,12 +110,12 @@ async def test_verify_url_saved_in_db(db_session, mock_httpx_success):
     assert saved_url.id == result.id
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_two_requests_same_custom_code_second_fails(db_session, mock_httpx_success):
     """Test: Two requests with same custom code, second fails."""
     # First request - should succeed
     url_data_1 = URLCreate(url="https://first.com", custom_code="duplicate")
-    result_1 = await create_short_url(url_data_1, db_session)
+    result_1 = await create_short_url(url_data_1, db_session, mock_httpx_success)
 
     assert result_1.short_code == "duplicate"
 
@@ -110,7 +123,7 @@ async def test_two_requests_same_custom_code_second_fails(db_session, mock_httpx
     url_data_2 = URLCreate(url="https://second.com", custom_code="duplicate")
 
     with pytest.raises(CustomCodeAlreadyExistsException) as exc_info:
-        await create_short_url(url_data_2, db_session)
+        await create_short_url(url_data_2, db_session, mock_httpx_success)
 
     assert exc_info.value.code == "duplicate"
 
@@ -125,7 +138,7 @@ async def test_two_requests_same_custom_code_second_fails(db_session, mock_httpx
     assert all_urls[0].target_url.rstrip("/") == "https://first.com"
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_create_multiple_urls_different(db_session, mock_httpx_success):
     """Test bonus: Create multiple URLs and verify all are saved."""
     urls_data = [
@@ -136,7 +149,7 @@ async def test_create_multiple_urls_different(db_session, mock_httpx_success):
 
     # Create all URLs
     for url_data in urls_data:
-        await create_short_url(url_data, db_session)
+        await create_short_url(url_data, db_session, mock_httpx_success)
 
     # Assert all are in DB
     query_result = await db_session.execute(select(URL))
@@ -145,3 +158,26 @@ async def test_create_multiple_urls_different(db_session, mock_httpx_success):
     assert len(all_urls) == 3
     saved_codes = {url.short_code for url in all_urls}
     assert saved_codes == {"code1", "code2", "code3"}
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_failed_probe_releases_custom_code(db_session):
+    """Test: A failed probe rolls back the reservation, so the code is free again at once."""
+    unreachable = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    reachable = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    with patch(
+        "app.services.url_service.is_url_unreachable_cached", new_callable=AsyncMock, return_value=False
+    ), patch(
+        "app.services.url_service.set_url_unreachable_cache", new_callable=AsyncMock
+    ), patch("app.services.url_service.set_url_cache", new_callable=AsyncMock):
+        with pytest.raises(URLNotReachableException):
+            await create_short_url(URLCreate(url="https://down.com", custom_code="reused"), db_session, unreachable)
+
+        query_result = await db_session.execute(select(URL).where(URL.short_code == "reused"))
+        assert query_result.scalar_one_or_none() is None
+
+        result = await create_short_url(URLCreate(url="https://up.com", custom_code="reused"), db_session, reachable)
+
+    assert result.short_code == "reused"
+    assert str(result.target_url) == "https://up.com/"
@@ -0,0 +1,68 @@
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.db.base_class import Base
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def test_engine():
+    """Create the test database engine once per module."""
+    # StaticPool: every session shares the one connection holding the in-memory DB
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    # pysqlite defers BEGIN, which breaks SAVEPOINT; emit it ourselves
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield engine
+
+    # The in-memory database goes away with its connection
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def db_session(test_engine):
+    """Create a per-test session whose writes are rolled back afterwards."""
+    async with test_engine.connect() as conn:
+        await conn.begin()
+        # Test and endpoint commits only release a SAVEPOINT inside the outer transaction
+        async_session = async_sessionmaker(
+            bind=conn,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+        async with async_session() as session:
+            yield session
+
+        await conn.rollback()
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def asgi_client():
+    """Create one test client per module; per-test fixtures install the overrides."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as ac:
+        yield ac
@@ -1,84 +1,54 @@
+import operator
+import re
 import pytest
 import pytest_asyncio
-from datetime import datetime, timedelta
-from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.dialects import postgresql
 
 from app.main import app
-from app.db.base_class import Base
+from app.api.v1.endpoints import analytics
 from app.db.models.url import URL
 from app.db.models.click import Click
 from app.api.deps import get_db
 
 
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+# One clock read per module. Pinned to midday UTC so clicks a few hours
+# apart always fall on the same day, whenever the suite runs
+NOW = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
 
 
-@pytest_asyncio.fixture
-async def test_engine():
-    """Create test database engine."""
-    engine = create_async_engine(
-        TEST_DATABASE_URL,
-        echo=False,
-        future=True,
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield engine
-    await engine.dispose()
-
-
-@pytest_asyncio.fixture
-async def db_session(test_engine):
-    """Create a test database session."""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
-    async with async_session() as session:
-        yield session
-
-
-@pytest_asyncio.fixture
-async def client(db_session):
-    """Create test client with database override."""
+@pytest_asyncio.fixture(loop_scope="module")
+async def client(asgi_client, db_session):
+    """Return the module test client with this test's database override."""
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app),
-        base_url="http://test",
-    ) as ac:
-        yield ac
+    yield asgi_client
 
     app.dependency_overrides.clear()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_analytics_returns_correct_data(client, db_session):
     """Test that analytics returns correct summary and clicks_by_day."""
     # Create test URL
     test_url = URL(
         short_code="testcode",
         target_url="https://example.com",
-        created_at=datetime.utcnow()
+        created_at=NOW,
     )
     db_session.add(test_url)
-    await db_session.commit()
-    await db_session.refresh(test_url)
+    await db_session.flush()  # Assigns test_url.id; committed together with the clicks
     
     # Create test clicks
-    now = datetime.utcnow()
     clicks = [
-        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=now),
-        Click(url_id=test_url.id, ip_address="192.168.1.2", created_at=now - timedelta(hours=1)),
-        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=now - timedelta(hours=2)),  # Duplicate IP
+        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=NOW),
+        Click(url_id=test_url.id, ip_address="192.168.1.2", created_at=NOW - timedelta(hours=1)),
+        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=NOW - timedelta(hours=2)),  # Duplicate IP
     ]
-    for click in clicks:
-        db_session.add(click)
+    db_session.add_all(clicks)
     await db_session.commit()
     
     # Test analytics
@@ -102,14 +72,14 @@ async def test_analytics_returns_correct_data(client, db_session):
     assert data["clicks_by_day"][0]["clicks"] == 3
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_analytics_with_no_clicks(client, db_session):
     """Test analytics for URL with no clicks."""
     # Create test URL without clicks
     test_url = URL(
         short_code="noclicks",
         target_url="https://example.com",
-        created_at=datetime.utcnow()
+        created_at=NOW,
     )
     db_session.add(test_url)
     await db_session.commit()
@@ -126,28 +96,25 @@ async def test_analytics_with_no_clicks(client, db_session):
     assert data["clicks_by_day"] == []
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_analytics_period_filtering(client, db_session):
     """Test that period parameter filters clicks correctly."""
     # Create test URL
     test_url = URL(
         short_code="periodtest",
         target_url="https://example.com",
-        created_at=datetime.utcnow()
+        created_at=NOW,
     )
     db_session.add(test_url)
-    await db_session.commit()
-    await db_session.refresh(test_url)
+    await db_session.flush()  # Assigns test_url.id; committed together with the clicks
     
     # Create clicks at different times
-    now = datetime.utcnow()
     clicks = [
-        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=now),  # Today
-        Click(url_id=test_url.id, ip_address="192.168.1.2", created_at=now - timedelta(days=5)),  # 5 days ago
-        Click(url_id=test_url.id, ip_address="192.168.1.3", created_at=now - timedelta(days=10)),  # 10 days ago
+        Click(url_id=test_url.id, ip_address="192.168.1.1", created_at=NOW),  # Today
+        Click(url_id=test_url.id, ip_address="192.168.1.2", created_at=NOW - timedelta(days=5)),  # 5 days ago
+        Click(url_id=test_url.id, ip_address="192.168.1.3", created_at=NOW - timedelta(days=10)),  # 10 days ago
     ]
-    for click in clicks:
-        db_session.add(click)
+    db_session.add_all(clicks)
     await db_session.commit()
     
     # Test 7d period (should exclude 10 days ago)
@@ -163,7 +130,7 @@ async def test_analytics_period_filtering(client, db_session):
     assert data_all["summary"]["total_clicks"] == 3
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_analytics_nonexistent_code_returns_404(client):
     """Test that analytics returns 404 for non-existent short code."""
     response = await client.get("/api/v1/analytics/doesnotexist")
@@ -171,3 +138,53 @@ async def test_analytics_nonexistent_code_returns_404(client):
     assert response.status_code == 404
     data = response.json()
     assert "not found" in data["detail"].lower()
+
+
+# "Today" for the rollup statement tests (any time of day: only the date matters)
+ROLLUP_TODAY = date(2026, 10, 15)
+
+_DAY_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "=": operator.eq}
+
+
+class FrozenDatetime(datetime):
+    """datetime whose now() is pinned to ROLLUP_TODAY, so raw_from is known."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 10, 15, 9, 30, tzinfo=timezone.utc)
+
+
+def day_conditions(sql: str, column: str) -> list:
+    """(comparison, date) pairs applied to `column` in compiled SQL."""
+    pattern = rf"(?<![\w.]){re.escape(column)} (<=|>=|<|>|=) '(\d{{4}}-\d\d-\d\d)'"
+    return [(_DAY_COMPARISONS[op], date.fromisoformat(day)) for op, day in re.findall(pattern, sql)]
+
+
+@pytest.mark.parametrize("start_date", [
+    None,
+    datetime(2026, 10, 8, 12, tzinfo=timezone.utc),  # 7d: rollup days in between
+    datetime(2026, 10, 13, 12, tzinfo=timezone.utc),  # Starts the day before raw_from
+    datetime(2026, 10, 14, 12, tzinfo=timezone.utc),  # Starts on raw_from
+])
+def test_rollup_and_raw_days_partition_the_period(monkeypatch, start_date):
+    """Test: Every day is served by exactly one of the rollup and raw branches."""
+    monkeypatch.setattr(analytics, "datetime", FrozenDatetime)
+    stmt = analytics._rollup_analytics_statement(1, start_date)
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    # Rollup day bounds are ANDed; raw days are ">= raw_from OR = start_day"
+    rollup = day_conditions(sql, "clicks_daily.click_date")
+    raw = day_conditions(sql, "clicks.click_date")
+    raw_window = {ROLLUP_TODAY - timedelta(days=i) for i in range(analytics.ROLLUP_RAW_DAYS)}
+    first_day = start_date.date() if start_date else ROLLUP_TODAY - timedelta(days=60)
+
+    for offset in range((ROLLUP_TODAY - first_day).days + 1):
+        day = first_day + timedelta(days=offset)
+        from_rollup = all(compare(day, bound) for compare, bound in rollup)
+        from_raw = any(compare(day, bound) for compare, bound in raw)
+        assert from_rollup != from_raw, f"{day} read from {'both branches' if from_rollup else 'neither branch'}"
+        # Recent (possibly unrefreshed) days and the partial first day come from raw clicks
+        assert from_raw == (day in raw_window or (start_date is not None and day == first_day)), day
+
+    if start_date:
+        assert f"clicks.created_at >= '{start_date.isoformat(sep=' ')}'" in sql
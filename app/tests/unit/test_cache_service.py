@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import pytest
+from collections import defaultdict
+from unittest.mock import AsyncMock
+
+from app.core.config import settings
+from app.core.exceptions import CacheError
+from app.services import cache_service
+from app.services.cache_service import (
+    NOT_FOUND_SENTINEL,
+    flush_url_clicks,
+    get_url_cache,
+    increment_url_clicks,
+    run_click_flusher,
+    set_url_not_found_cache,
+    _reachability_key,
+)
+
+
+class FakeScript:
+    """Registered _GET_AND_TOUCH_SCRIPT: GET, then EXPIRE unless the value is the sentinel."""
+
+    def __init__(self, redis_client):
+        self.registered_client = redis_client
+
+    async def __call__(self, keys, args):
+        ttl, sentinel = args
+        value = self.registered_client.values.get(keys[0])
+        if value is not None and value != sentinel:
+            self.registered_client.ttls[keys[0]] = ttl
+        return value
+
+
+class FakePipeline:
+    """Non-transactional pipeline: queues INCRBY commands and applies them on execute()."""
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incrby(self, key, amount):
+        self.commands.append((key, amount))
+
+    async def execute(self):
+        if self.redis_client.fail_pipeline:
+            raise ConnectionError("Connection refused")
+        self.redis_client.round_trips.append(self.commands)
+        for key, amount in self.commands:
+            self.redis_client.values[key] = self.redis_client.values.get(key, 0) + amount
+
+
+class FakeRedis:
+    """
+    Minimal redis.asyncio.Redis stand-in holding plain dicts.
+
+    values maps key -> value and ttls maps key -> TTL in seconds (None for
+    no expiry), so tests assert on the resulting state directly.
+    round_trips holds the commands of each executed pipeline.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.round_trips = []
+        self.fail_pipeline = False
+
+    def register_script(self, script):
+        return FakeScript(self)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Route cache_service's Redis calls to a FakeRedis."""
+    redis_client = FakeRedis()
+    monkeypatch.setattr("app.services.cache_service.get_redis", AsyncMock(return_value=redis_client))
+    return redis_client
+
+
+@pytest.fixture
+def pending_clicks(monkeypatch):
+    """Start each test with no aggregated clicks."""
+    monkeypatch.setattr(cache_service, "_pending_clicks", defaultdict(int))
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_url_cache_refreshes_mapping_ttl(fake_redis):
+    """Test: A cache hit returns the URL and resets its TTL."""
+    fake_redis.values["abc123"] = "https://example.com"
+    fake_redis.ttls["abc123"] = 5
+
+    assert await get_url_cache("abc123") == "https://example.com"
+    assert fake_redis.ttls["abc123"] == settings.CACHE_TTL_SECONDS
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_url_cache_keeps_not_found_sentinel_ttl(fake_redis):
+    """Test: The negative-cache sentinel is returned without extending its short TTL."""
+    fake_redis.values["gone42"] = NOT_FOUND_SENTINEL
+    fake_redis.ttls["gone42"] = settings.NEGATIVE_CACHE_TTL_SECONDS
+
+    assert await get_url_cache("gone42") == NOT_FOUND_SENTINEL
+    assert fake_redis.ttls["gone42"] == settings.NEGATIVE_CACHE_TTL_SECONDS
+
+
+@pytest.mark.parametrize("key, ttl", [
+    ("clicks:abc123", None),
+    (_reachability_key("https://down.example.com"), settings.UNREACHABLE_CACHE_TTL_SECONDS),
+])
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_url_cache_leaves_non_mapping_keys_alone(fake_redis, key, ttl):
+    """Test: A short code naming another key (click counter, reachability entry) keeps its TTL."""
+    fake_redis.values[key] = "7"
+    fake_redis.ttls[key] = ttl
+
+    assert await get_url_cache(key) is None
+    assert fake_redis.ttls[key] == ttl
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_not_found_cache_skips_non_mapping_keys(fake_redis):
+    """Test: A miss on a non-short-code path never writes the sentinel under that key."""
+    await set_url_not_found_cache("clicks:new")
+
+    assert "clicks:new" not in fake_redis.values
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_clicks_are_aggregated_into_one_incrby_per_code(fake_redis, pending_clicks):
+    """Test: Repeated clicks on a code become a single INCRBY of their sum, all in one round trip."""
+    for _ in range(3):
+        increment_url_clicks("abc123")
+    increment_url_clicks("xyz789")
+
+    await flush_url_clicks()
+
+    assert fake_redis.round_trips == [[("clicks:abc123", 3), ("clicks:xyz789", 1)]]
+    assert fake_redis.values == {"clicks:abc123": 3, "clicks:xyz789": 1}
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_flush_swaps_out_pending_clicks(fake_redis, pending_clicks):
+    """Test: Flushing replaces the pending dict, so clicks recorded afterwards go to the next flush."""
+    increment_url_clicks("abc123")
+    flushed = cache_service._pending_clicks
+
+    await flush_url_clicks()
+    increment_url_clicks("abc123")
+
+    assert cache_service._pending_clicks is not flushed
+    assert dict(cache_service._pending_clicks) == {"abc123": 1}
+    assert dict(flushed) == {"abc123": 1}
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_flush_with_nothing_pending_skips_redis(fake_redis, pending_clicks):
+    """Test: An idle flush makes no round trip."""
+    await flush_url_clicks()
+
+    assert fake_redis.round_trips == []
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_pipeline_failure_raises_cache_error(fake_redis, pending_clicks):
+    """Test: A failed pipeline raises CacheError and its counts are dropped, not retried."""
+    fake_redis.fail_pipeline = True
+    increment_url_clicks("abc123")
+
+    with pytest.raises(CacheError):
+        await flush_url_clicks()
+
+    assert not cache_service._pending_clicks
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_click_flusher_logs_failures_and_keeps_running(fake_redis, pending_clicks, caplog):
+    """Test: run_click_flusher logs a failed flush and flushes again on the next tick."""
+    fake_redis.fail_pipeline = True
+    increment_url_clicks("abc123")
+
+    with caplog.at_level(logging.WARNING, logger=cache_service.__name__):
+        flusher = asyncio.create_task(run_click_flusher(0.001))
+        await asyncio.sleep(0.01)
+        fake_redis.fail_pipeline = False
+        increment_url_clicks("abc123")
+        await asyncio.sleep(0.01)
+        flusher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flusher
+
+    assert "Error flushing URL clicks" in caplog.text
+    assert fake_redis.values == {"clicks:abc123": 1}
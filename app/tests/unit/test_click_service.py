@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.click import Click
+from app.db.models.url import URL
+from app.services import click_service
+
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def url_id(db_session, monkeypatch):
+    """
+    Give the click writer sessions on the test connection and return a URL id to click.
+
+    The writer's commits release SAVEPOINTs inside db_session's outer
+    transaction, so every inserted click is rolled back after the test.
+    """
+    session_factory = async_sessionmaker(
+        bind=db_session.bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    monkeypatch.setattr(click_service, "AsyncSessionLocal", session_factory)
+    # A fresh queue per test: asyncio.Queue binds to the loop that first waits on it
+    monkeypatch.setattr(click_service, "_click_queue", asyncio.Queue(maxsize=100))
+
+    url = URL(short_code="clicked", target_url="https://example.com")
+    db_session.add(url)
+    await db_session.commit()
+    return url.id
+
+
+@pytest.fixture
+def written_batches(monkeypatch):
+    """Sizes of the batches handed to _write_clicks, in order."""
+    batches = []
+    write_clicks = click_service._write_clicks
+
+    async def recording_write(batch):
+        batches.append(len(batch))
+        await write_clicks(batch)
+
+    monkeypatch.setattr(click_service, "_write_clicks", recording_write)
+    return batches
+
+
+async def stored_clicks(db_session) -> int:
+    return await db_session.scalar(select(func.count()).select_from(Click))
+
+
+async def wait_for_batches(batches: list[int], n: int) -> None:
+    """Wait (at most 1s) until the writer has handed over `n` batches."""
+    async def poll():
+        while len(batches) < n:
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(poll(), 1)
+
+
+async def stop(writer: asyncio.Task) -> None:
+    writer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await writer
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_full_batch_is_written_without_waiting(db_session, url_id, written_batches):
+    """Test: A batch is written as soon as it reaches batch_size, long before max_wait."""
+    for i in range(5):
+        click_service.track_click(url_id, f"10.0.0.{i}")
+
+    writer = asyncio.create_task(click_service.run_click_writer(batch_size=3, max_wait=60))
+    await wait_for_batches(written_batches, 1)
+    await stop(writer)
+    await click_service.flush_clicks()
+
+    assert written_batches[0] == 3
+    assert await stored_clicks(db_session) == 5
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_partial_batch_is_written_at_deadline(db_session, url_id, written_batches):
+    """Test: A batch that never fills is written once max_wait has passed."""
+    writer = asyncio.create_task(click_service.run_click_writer(batch_size=100, max_wait=0.02))
+    click_service.track_click(url_id, "10.0.0.1")
+    click_service.track_click(url_id, "10.0.0.2")
+
+    await wait_for_batches(written_batches, 1)
+    await stop(writer)
+
+    assert written_batches == [2]
+    assert await stored_clicks(db_session) == 2
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_cancel_while_collecting_loses_no_clicks(db_session, url_id, written_batches):
+    """Test: Clicks taken off the queue for a batch are written when the writer is cancelled."""
+    writer = asyncio.create_task(click_service.run_click_writer(batch_size=100, max_wait=60))
+    for i in range(7):
+        click_service.track_click(url_id, f"10.0.0.{i}")
+    await asyncio.sleep(0.01)  # Writer is now waiting for more clicks to fill the batch
+
+    await stop(writer)
+    await click_service.flush_clicks()
+
+    assert await stored_clicks(db_session) == 7
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_cancel_during_write_loses_no_clicks(db_session, url_id, monkeypatch):
+    """Test: A cancel landing mid-INSERT lets that batch finish; flush_clicks writes the rest."""
+    writing = asyncio.Event()
+    write_clicks = click_service._write_clicks
+
+    async def slow_write(batch):
+        writing.set()
+        await asyncio.sleep(0.02)
+        await write_clicks(batch)
+
+    monkeypatch.setattr(click_service, "_write_clicks", slow_write)
+    for i in range(5):
+        click_service.track_click(url_id, f"10.0.0.{i}")
+
+    writer = asyncio.create_task(click_service.run_click_writer(batch_size=2, max_wait=60))
+    await asyncio.wait_for(writing.wait(), 1)
+    await stop(writer)
+    await click_service.flush_clicks()
+
+    assert await stored_clicks(db_session) == 5
+
+
+def test_track_click_drops_and_logs_when_queue_full(monkeypatch, caplog):
+    """Test: A full queue drops the click and logs it instead of blocking the redirect."""
+    monkeypatch.setattr(click_service, "_click_queue", asyncio.Queue(maxsize=1))
+
+    with caplog.at_level(logging.ERROR, logger=click_service.__name__):
+        click_service.track_click(1, "10.0.0.1")
+        click_service.track_click(2, "10.0.0.2")
+
+    assert click_service._click_queue.qsize() == 1
+    assert click_service._click_queue.get_nowait()[0] == 1
+    assert "queue full" in caplog.text
+    assert "url_id=2" in caplog.text
+
+
+class FakeRefreshSession:
+    """AsyncSession stand-in for refresh_clicks_daily: the lock query answers lock_acquired."""
+
+    def __init__(self, lock_acquired: bool):
+        self.lock_acquired = lock_acquired
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def scalar(self, statement):
+        self.statements.append(str(statement))
+        return self.lock_acquired
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.parametrize("lock_acquired", [True, False])
+@pytest.mark.asyncio(loop_scope="module")
+async def test_refresh_runs_only_under_advisory_lock(monkeypatch, lock_acquired):
+    """Test: clicks_daily is refreshed only by the worker that gets the advisory lock."""
+    session = FakeRefreshSession(lock_acquired)
+    monkeypatch.setattr(click_service, "AsyncSessionLocal", lambda: session)
+
+    assert await click_service.refresh_clicks_daily() is lock_acquired
+
+    assert "pg_try_advisory_xact_lock" in session.statements[0]
+    refreshed = any("REFRESH MATERIALIZED VIEW" in statement for statement in session.statements)
+    assert refreshed is lock_acquired
@@ -1,15 +1,18 @@
 import pytest
 
 from app.utils.code_generator import (
-    SAFE_CHARACTERS,
+    SAFE_CHARACTER_SET,
     generate_code,
+    generate_codes,
+    is_short_code,
     is_valid_custom_code,
 )
 
 
 def test_generate_1000_codes_uniqueness():
     """Generate 1000 codes and verify all are unique."""
-    codes = [generate_code() for _ in range(1000)]
+    # One batched call: a single random read instead of 1000
+    codes = generate_codes(1000)
     assert len(codes) == len(set(codes)), "All codes must be unique"
 
 
@@ -22,10 +25,17 @@ def test_correct_length(length: int):
 
 def test_only_valid_characters():
     """All code characters are in the allowed alphabet."""
-    for _ in range(100):
-        code = generate_code(length=8)
-        for char in code:
-            assert char in SAFE_CHARACTERS, f"Character '{char}' not allowed in {code}"
+    codes = [generate_code(length=8) for _ in range(100)]
+    assert set(''.join(codes)) <= SAFE_CHARACTER_SET
+
+
+def test_generate_codes_batch():
+    """A batch has the requested number of codes, each of the given length and alphabet."""
+    codes = generate_codes(5, length=8)
+    assert len(codes) == 5
+    for code in codes:
+        assert len(code) == 8
+        assert set(code) <= SAFE_CHARACTER_SET
 
 
 def test_valid_custom_code_passes():
@@ -44,4 +54,19 @@ def test_custom_code_with_spaces_fails():
 
 def test_custom_code_admin_fails():
     """Custom code 'admin' (reserved) fails."""
-    assert is_valid_custom_code("admin") is False
\ No newline at end of file
+    assert is_valid_custom_code("admin") is False
+
+def test_custom_code_with_edge_dash_fails():
+    """Custom code starting or ending with a dash fails."""
+    assert is_valid_custom_code("-abc") is False
+    assert is_valid_custom_code("abc-") is False
+    assert is_valid_custom_code("a-bc") is True
+
+
+def test_generated_and_custom_codes_are_short_codes():
+    """Every generated code (dashes anywhere) and valid custom code is a short code; other Redis keys are not."""
+    assert all(is_short_code(code) for code in generate_codes(200))
+    assert is_short_code("my-link") is True
+    assert is_short_code("clicks:abc123") is False
+    assert is_short_code("url:reach:0123abcd") is False
+    assert is_short_code("test_key") is False
@@ -3,77 +3,40 @@ Unit tests for the redirect endpoint (GET /{short_code}).
 """
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import select
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import datetime, timezone, timedelta
 
 from app.main import app
-from app.db.base_class import Base
 from app.db.models.url import URL
 from app.api.deps import get_db
+from app.services.cache_service import NOT_FOUND_SENTINEL
+from app.core.exceptions import CacheError
 
 
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+@pytest.fixture
+def mock_redis_cache(monkeypatch):
+    """Mock cache and click tracking so tests don't need Redis/real Postgres."""
+    monkeypatch.setattr("app.api.v1.endpoints.redirect.get_url_cache", AsyncMock(return_value=None))
+    monkeypatch.setattr("app.api.v1.endpoints.redirect.set_url_not_found_cache", AsyncMock())
+    monkeypatch.setattr("app.api.v1.endpoints.redirect.increment_url_clicks", MagicMock())
+    monkeypatch.setattr("app.services.click_service.track_click", MagicMock())
 
 
-@pytest_asyncio.fixture
-async def test_engine():
-    """Create test database engine."""
-    engine = create_async_engine(
-        TEST_DATABASE_URL,
-        echo=False,
-        future=True,
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield engine
-    await engine.dispose()
-
-
-@pytest_asyncio.fixture
-async def db_session(test_engine):
-    """Create a test database session."""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
-    async with async_session() as session:
-        yield session
-
-
-@pytest_asyncio.fixture
-async def client(db_session):
-    """Create test client with database override and mocked cache."""
+@pytest_asyncio.fixture(loop_scope="module")
+async def client(asgi_client, db_session, mock_redis_cache):
+    """Return the module test client with database override and mocked cache."""
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
 
-    # Mock cache and click tracking so tests don't need Redis/real Postgres
-    with patch(
-        "app.api.v1.endpoints.redirect.get_url_cache",
-        new_callable=AsyncMock,
-        return_value=None,
-    ), patch(
-        "app.api.v1.endpoints.redirect.increment_url_clicks",
-        new_callable=AsyncMock,
-    ), patch(
-        "app.services.click_service.track_click",
-        new_callable=AsyncMock,
-    ):
-        async with AsyncClient(
-            transport=ASGITransport(app=app),
-            base_url="http://test",
-        ) as ac:
-            yield ac
+    yield asgi_client
 
     app.dependency_overrides.clear()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_valid_code_returns_307(client, db_session):
     """Test: Valid code returns 307."""
     # Create URL in test DB
@@ -89,7 +52,7 @@ async def test_valid_code_returns_307(client, db_session):
     assert response.status_code == 307
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_location_header_is_correct(client, db_session):
     """Test: Location header is correct."""
     target = "https://google.com/search?q=test"
@@ -106,7 +69,7 @@ async def test_location_header_is_correct(client, db_session):
     assert response.headers["location"] == target
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_nonexistent_code_returns_404(client):
     """Test: Nonexistent code returns 404."""
     response = await client.get("/NoExiste999")
@@ -117,7 +80,7 @@ async def test_nonexistent_code_returns_404(client):
     assert "NoExiste999" in data["detail"]
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_expired_url_returns_410(client, db_session):
     """Test: Expired URL returns 410."""
     expired_at = datetime.now(timezone.utc) - timedelta(hours=1)
@@ -134,3 +97,57 @@ async def test_expired_url_returns_410(client, db_session):
     assert response.status_code == 410
     data = response.json()
     assert "expired" in data["detail"].lower()
+
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_not_yet_expired_url_returns_307(client, db_session):
+    """Test: URL with a future expiration still redirects."""
+    url = URL(
+        short_code="notexpired",
+        target_url="https://example.com",
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    db_session.add(url)
+    await db_session.commit()
+
+    response = await client.get("/notexpired")
+
+    assert response.status_code == 307
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_cached_not_found_returns_404_without_db(client, db_session):
+    """Test: Negative-cached code returns 404 without querying the DB."""
+    url = URL(
+        short_code="negcache",
+        target_url="https://example.com",
+    )
+    db_session.add(url)
+    await db_session.commit()
+
+    with patch(
+        "app.api.v1.endpoints.redirect.get_url_cache",
+        new_callable=AsyncMock,
+        return_value=NOT_FOUND_SENTINEL,
+    ), patch("app.api.v1.endpoints.redirect.get_url_redirect_info", new_callable=AsyncMock) as mock_get_url:
+        response = await client.get("/negcache")
+
+    assert response.status_code == 404
+    mock_get_url.assert_not_called()
+
+
+@pytest.mark.parametrize("cache_error", [None, CacheError("Error setting URL not-found cache")])
+@pytest.mark.asyncio(loop_scope="module")
+async def test_db_miss_caches_not_found(client, cache_error):
+    """Test: A DB miss negative-caches the code, and still returns 404 if Redis fails."""
+    with patch(
+        "app.api.v1.endpoints.redirect.set_url_not_found_cache",
+        new_callable=AsyncMock,
+        side_effect=cache_error,
+    ) as mock_set_not_found:
+        response = await client.get("/missing1")
+
+    assert response.status_code == 404
+    assert "missing1" in response.json()["detail"]
+    mock_set_not_found.assert_awaited_once_with("missing1")
@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from pydantic import ValidationError
 
 from app.schemas.url import URLCreate
@@ -29,4 +30,17 @@ def test_custom_code_with_special_characters_fails():
 def test_custom_code_too_long_fails():
     """custom_code too long fails (max 20)."""
     with pytest.raises(ValidationError):
-        URLCreate(url="https://example.com", custom_code="a" * 21)
\ No newline at end of file
+        URLCreate(url="https://example.com", custom_code="a" * 21)
+
+
+def test_expires_at_is_normalized_to_utc():
+    """expires_at is stored UTC-aware (naive input taken as UTC, offsets converted)."""
+    naive = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1)
+    data = URLCreate(url="https://example.com", expires_at=naive)
+    assert data.expires_at.tzinfo == timezone.utc
+    assert data.expires_at.replace(tzinfo=None) == naive
+
+    offset = datetime.now(timezone(timedelta(hours=-6))) + timedelta(days=1)
+    data = URLCreate(url="https://example.com", expires_at=offset)
+    assert data.expires_at.tzinfo == timezone.utc
+    assert data.expires_at == offset
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.db.session import _engine_options
+
+POSTGRES_URL = "postgresql+asyncpg://user:pass@db:5432/urlshort"
+
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    """Known pool settings: 20 + 10 overflow for the deployment, 4 workers."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "DB_POOL_PER_WORKER", False)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    return monkeypatch
+
+
+def test_sqlite_keeps_sqlalchemy_defaults(pool_settings):
+    """Test: SQLite gets no pool options (its pools reject pool sizing)."""
+    assert _engine_options("sqlite+aiosqlite:///:memory:") == {}
+
+
+def test_postgres_pool_per_process(pool_settings):
+    """Test: Without DB_POOL_PER_WORKER every worker gets the full configured pool."""
+    assert _engine_options(POSTGRES_URL) == {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {"server_settings": {"statement_timeout": "5000"}},
+    }
+
+
+def test_postgres_pool_split_across_workers(pool_settings):
+    """Test: With DB_POOL_PER_WORKER the sizes are divided by WEB_CONCURRENCY."""
+    pool_settings.setattr(settings, "DB_POOL_PER_WORKER", True)
+
+    options = _engine_options(POSTGRES_URL)
+
+    assert (options["pool_size"], options["max_overflow"]) == (5, 2)
+
+
+def test_postgres_pool_split_keeps_one_connection(pool_settings):
+    """Test: More workers than pooled connections still leaves each worker one connection."""
+    pool_settings.setattr(settings, "DB_POOL_PER_WORKER", True)
+    pool_settings.setattr(settings, "WEB_CONCURRENCY", 32)
+
+    options = _engine_options(POSTGRES_URL)
+
+    assert (options["pool_size"], options["max_overflow"]) == (1, 0)
+
+
+def test_statement_timeout_only_for_asyncpg(pool_settings):
+    """Test: server_settings is an asyncpg connect argument; other drivers don't get it."""
+    options = _engine_options("postgresql+psycopg://user:pass@db:5432/urlshort")
+
+    assert "connect_args" not in options
+    assert options["poolclass"] is AsyncAdaptedQueuePool
@@ -1,19 +1,46 @@
-import secrets
+import os
 import re
+from functools import lru_cache
 
 SAFE_CHARACTERS = "abcdefghjkmnpqrstuvwxyzABCDEFGHJKMNPQRSTUVWXYZ23456789-"
-RESERVED_CODES = ['api', 'admin', 'user', 'login', 'logout', 'register', 'reset', 'forgot']
+SAFE_CHARACTER_SET = frozenset(SAFE_CHARACTERS)
+RESERVED_CODES = frozenset({'api', 'admin', 'user', 'login', 'logout', 'register', 'reset', 'forgot'})
+
+# Length bounds (3-20) and the no leading/trailing dash rule folded into the
+# pattern so validation is a single match
+_CUSTOM_CODE_RE = re.compile(r'[a-zA-Z0-9][a-zA-Z0-9\-]{1,18}[a-zA-Z0-9]')
+
+# Anything a stored short code can look like, generated or custom. Other
+# Redis keys (clicks:*, url:reach:*) contain a ':' and never match
+_SHORT_CODE_RE = re.compile(r'[a-zA-Z0-9\-]{1,20}')
+
+# Bytes at or above the largest multiple of the alphabet size are rejected,
+# so every character stays equally likely (plain modulo would be biased).
+# bytes.translate maps and drops them in C, with no per-byte Python loop
+_BYTE_LIMIT = 256 - 256 % len(SAFE_CHARACTERS)
+_BYTE_TO_CHAR = bytes(
+    SAFE_CHARACTERS.encode()[b % len(SAFE_CHARACTERS)] if b < _BYTE_LIMIT else 0
+    for b in range(256)
+)
+_REJECTED_BYTES = bytes(range(_BYTE_LIMIT, 256))
+
+def generate_codes(n: int = 3, length: int = 6) -> list[str]:
+    # One os.urandom read per burst instead of a CSPRNG call per character
+    needed = n * length
+    chars = b''
+    while len(chars) < needed:
+        # ~14% of bytes are rejected; over-draw so one read almost always suffices
+        raw = os.urandom((needed - len(chars)) * 5 // 4 + 8)
+        chars += raw.translate(_BYTE_TO_CHAR, _REJECTED_BYTES)
+    text = chars[:needed].decode('ascii')
+    return [text[i:i + length] for i in range(0, needed, length)]
 
 def generate_code(length: int = 6) -> str:
-    return ''.join(secrets.choice(SAFE_CHARACTERS) for _ in range(length))
+    return generate_codes(1, length)[0]
 
+@lru_cache(maxsize=4096)
 def is_valid_custom_code(code: str) -> bool:
-    if len(code) < 3 or len(code) > 20:
-        return False
-    if not re.match(r'^[a-zA-Z0-9\-]+$', code):
-        return False
-    if code.startswith('-') or code.endswith('-'):
-        return False
-    if code in RESERVED_CODES:
-        return False
-    return True
+    return _CUSTOM_CODE_RE.fullmatch(code) is not None and code not in RESERVED_CODES
+
+def is_short_code(code: str) -> bool:
+    return _SHORT_CODE_RE.fullmatch(code) is not None
@@ -1,156 +1,276 @@
 #!/usr/bin/env python3
 """
 Script to check database contents.
-Usage: python scripts/check-db.py [--limit N]
+Usage: python scripts/check-db.py [--limit N] [--exact-count] [--show-ttl]
 """
+from __future__ import annotations
+
 import asyncio
 import sys
 import argparse
+from contextlib import AsyncExitStack
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+try:
+    import uvloop  # libuv event loop: cheaper awaits on the DB and Redis round trips
+except ImportError:
+    uvloop = None
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy import text
+# SQLAlchemy is imported only by the database check (see create_engine and
+# check_database), so --redis-only does not pay for importing it
+from redis.asyncio import Redis
 from app.core.config import settings
+from app.services.cache_service import CLICKS_KEY_PREFIX, NOT_FOUND_SENTINEL, REACHABILITY_KEY_PREFIX
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
-async def check_database(limit: int = 10):
-    """Check database contents and display URL records."""
-    print("=" * 80)
-    print("DATABASE CHECK")
-    print("=" * 80)
-    print(f"Database URL: {settings.DATABASE_URL}")
-    print()
-    
-    engine = create_async_engine(settings.DATABASE_URL)
+
+# Report decoration, built once
+BANNER = "=" * 80 + "\n"
+SEPARATOR = "-" * 80 + "\n"
+
+# Redis keys and values that are not URL mappings (compared as raw bytes)
+SKIPPED_KEY_PREFIXES = (CLICKS_KEY_PREFIX.encode(), REACHABILITY_KEY_PREFIX.encode())
+NOT_FOUND_VALUE = NOT_FOUND_SENTINEL.encode()
+
+# Queries (wrapped in text() by check_database); LIMIT is a bound parameter
+# pg_tables is a plain catalog view, without information_schema's joins
+SQL_TABLES = "SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname='public'"
+SQL_EXACT_COUNT = "SELECT COUNT(*) FROM urls"
+# Planner estimate: no table scan; -1 until urls is first analyzed
+SQL_ESTIMATED_COUNT = "SELECT reltuples::bigint FROM pg_class WHERE oid = 'urls'::regclass"
+SQL_RECENT_URLS = (
+    "SELECT id, short_code, target_url, created_at "
+    "FROM urls ORDER BY id DESC LIMIT :limit"
+)
+
+
+def create_engine() -> AsyncEngine:
+    """Create the script's engine: a small pool shared by every DB check."""
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    connect_args = {}
+    if make_url(settings.DATABASE_URL).get_driver_name() == "asyncpg":
+        # Every statement runs once: statement caches would never get a hit
+        connect_args = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    # No pre-ping: the script's connections are fresh, a ping is a wasted round trip
+    return create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=5,
+        max_overflow=0,
+        connect_args=connect_args,
+    )
+
+
+async def _fetch_all(engine: AsyncEngine, statement, params: dict | None = None) -> list:
+    """Run one query on its own pooled connection and return all rows."""
+    async with engine.connect() as conn:
+        result = await conn.execute(statement, params)
+        return result.fetchall()
+
+
+async def _fetch_recent_urls(engine: AsyncEngine, statement, limit: int) -> list[str]:
+    """Stream the most recent URLs and return their formatted output entries."""
+    async with engine.connect() as conn:
+        # Server-side cursor: rows arrive in batches and are formatted as they
+        # come, so a large --limit never holds every Row object at once
+        result = await conn.stream(statement, {"limit": limit})
+        return [
+            f"ID: {row[0]:<4} | Code: {row[1]:<10} | Created: {row[3]}\n"
+            f"         | URL: {row[2]}\n\n"
+            async for row in result
+        ]
+
+
+async def check_database(
+    engine: AsyncEngine, out: list[str], limit: int = 10, exact_count: bool = False
+) -> bool:
+    """Check database contents and append the report (URL records) to out."""
+    from sqlalchemy import text
+
+    out.append(BANNER)
+    out.append("DATABASE CHECK\n")
+    out.append(BANNER)
+    out.append(f"Database URL: {settings.DATABASE_URL}\n\n")
     
     try:
-        async with engine.connect() as conn:
-            # Check connection
-            print("✓ Database connection successful")
-            print()
-            
-            # Get table info
-            result = await conn.execute(text(
-                "SELECT table_name FROM information_schema.tables "
-                "WHERE table_schema='public'"
-            ))
-            tables = result.fetchall()
-            print(f"Tables in database: {', '.join(t[0] for t in tables)}")
-            print()
-            
-            # Get URL count
-            result = await conn.execute(text("SELECT COUNT(*) FROM urls"))
-            count = result.scalar()
-            print(f"Total URLs in database: {count}")
-            print()
-            
-            if count > 0:
-                # Get recent URLs
-                result = await conn.execute(text(
-                    f"SELECT id, short_code, target_url, created_at "
-                    f"FROM urls ORDER BY id DESC LIMIT :limit"
-                ), {"limit": limit})
-                rows = result.fetchall()
-                
-                print(f"Recent URLs (showing {len(rows)}):")
-                print("-" * 80)
-                for row in rows:
-                    print(f"ID: {row[0]:<4} | Code: {row[1]:<10} | Created: {row[3]}")
-                    print(f"         | URL: {row[2]}")
-                    print()
+        # The three queries are independent: run them concurrently on separate
+        # pooled connections, so the check costs one round trip, not three
+        tables, count_rows, url_entries = await asyncio.gather(
+            _fetch_all(engine, text(SQL_TABLES)),
+            _fetch_all(engine, text(SQL_EXACT_COUNT if exact_count else SQL_ESTIMATED_COUNT)),
+            _fetch_recent_urls(engine, text(SQL_RECENT_URLS), limit),
+        )
+        count = count_rows[0][0]
+
+        out.append("✓ Database connection successful\n\n")
+        
+        out.append(f"Tables in database: {', '.join(t[0] for t in tables)}\n\n")
+        
+        if exact_count:
+            out.append(f"Total URLs in database: {count}\n\n")
+        elif count >= 0:
+            out.append(f"Total URLs (approx): {count}\n\n")
+        else:
+            out.append("Total URLs (approx): unknown, table not analyzed yet (use --exact-count)\n\n")
+        
+        if url_entries:
+            out.append(f"Recent URLs (showing {len(url_entries)}):\n")
+            out.append(SEPARATOR)
+            out.extend(url_entries)
     
     except Exception as e:
-        print(f"✗ Error: {e}")
+        out.append(f"✗ Error: {e}\n")
         return False
     
-    finally:
-        await engine.dispose()
-    
     return True
 
 
-async def check_redis():
-    """Check Redis cache contents."""
-    from redis.asyncio import Redis
-    
-    print("=" * 80)
-    print("REDIS CACHE CHECK")
-    print("=" * 80)
-    print(f"Redis URL: {settings.REDIS_URL}")
-    print()
-    
-    redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+def create_redis_client() -> Redis:
+    """Create the script's Redis client; its one pool serves every Redis command."""
+    # Raw bytes: only the handful of keys and values displayed get decoded
+    return Redis.from_url(settings.REDIS_URL, max_connections=4)
+
+
+async def cached_urls(redis_client: Redis, limit: int = 10) -> list[tuple[bytes, bytes]]:
+    """
+    Return up to `limit` (short code, target URL) mappings from the cache.
+
+    SCANs incrementally, skipping click counters, reachability entries and
+    test keys, and MGETs candidates in batches so not-found sentinels can be
+    dropped too; stops as soon as there are enough to show.
+    """
+    found = []
+    candidates = []
+    async for key in redis_client.scan_iter(match='*', count=500):
+        if key.startswith(SKIPPED_KEY_PREFIXES) or key == b'test_key':
+            continue
+        candidates.append(key)
+        if len(found) + len(candidates) < limit:
+            continue
+        found += await _url_mappings(redis_client, candidates)
+        candidates = []
+        if len(found) == limit:
+            break
+    else:
+        found += await _url_mappings(redis_client, candidates)
+    return found
+
+
+async def _url_mappings(redis_client: Redis, keys: list[bytes]) -> list[tuple[bytes, bytes]]:
+    """One MGET for all keys; drops not-found sentinels and keys that expired meanwhile."""
+    if not keys:
+        return []
+    values = await redis_client.mget(keys)
+    return [(key, value) for key, value in zip(keys, values) if value is not None and value != NOT_FOUND_VALUE]
+
+
+async def check_redis(redis_client: Redis, out: list[str], show_ttl: bool = False) -> bool:
+    """Check Redis cache contents and append the report to out."""
+    out.append(BANNER)
+    out.append("REDIS CACHE CHECK\n")
+    out.append(BANNER)
+    out.append(f"Redis URL: {settings.REDIS_URL}\n\n")
     
     try:
-        # Test connection
-        await redis_client.ping()
-        print("✓ Redis connection successful")
-        print()
+        # No PING first: DBSIZE fails the same way if Redis is unreachable.
+        # DBSIZE is O(1); KEYS '*' would block the server on a large keyspace
+        key_count = await redis_client.dbsize()
+        out.append("✓ Redis connection successful\n\n")
+        out.append(f"Total keys in cache: {key_count}\n")
         
-        # Get all keys
-        keys = await redis_client.keys('*')
-        print(f"Total keys in cache: {len(keys)}")
-        
-        if keys:
-            print()
-            print("Cached URLs:")
-            print("-" * 80)
-            
-            # Filter out clicks keys and test keys
-            url_keys = [k for k in keys if not k.startswith('clicks:') and k != 'test_key']
+        if key_count:
+            out.append("\n")
+            out.append("Cached URLs:\n")
+            out.append(SEPARATOR)
             
-            for key in url_keys[:10]:  # Show first 10
-                value = await redis_client.get(key)
-                ttl = await redis_client.ttl(key)
-                ttl_str = f"{ttl}s" if ttl > 0 else "no expiry"
-                print(f"Code: {key:<10} | URL: {value}")
-                print(f"         | TTL: {ttl_str}")
-                print()
-        
-        await redis_client.aclose()
+            mappings = await cached_urls(redis_client)
+            batch = [key for key, _ in mappings]
+            entries = [
+                f"Code: {key.decode(errors='replace'):<10} | URL: {value.decode(errors='replace')}\n"
+                for key, value in mappings
+            ]
+
+            if show_ttl and batch:
+                # TTLs are opt-in: one more pipelined round trip
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for key in batch:
+                        pipe.ttl(key)
+                    ttls = await pipe.execute()
+                entries = [
+                    f"{entry}         | TTL: {f'{ttl}s' if ttl > 0 else 'no expiry'}\n"
+                    for entry, ttl in zip(entries, ttls)
+                ]
+
+            out.extend(f"{entry}\n" for entry in entries)
         
     except Exception as e:
-        print(f"✗ Error: {e}")
+        out.append(f"✗ Error: {e}\n")
         return False
     
     return True
 
 
+# Built once at import, not on every main() call
+_PARSER = argparse.ArgumentParser(description='Check database and cache contents')
+_PARSER.add_argument('--limit', type=int, default=10,
+                     help='Number of recent URLs to show (default: 10)')
+_PARSER.add_argument('--exact-count', action='store_true',
+                     help='Count URLs with COUNT(*) instead of the planner estimate')
+_PARSER.add_argument('--show-ttl', action='store_true',
+                     help='Also show the TTL of each cached URL')
+_PARSER.add_argument('--db-only', action='store_true',
+                     help='Check database only')
+_PARSER.add_argument('--redis-only', action='store_true',
+                     help='Check Redis cache only')
+
+
 async def main():
     """Main function."""
-    parser = argparse.ArgumentParser(description='Check database and cache contents')
-    parser.add_argument('--limit', type=int, default=10,
-                       help='Number of recent URLs to show (default: 10)')
-    parser.add_argument('--db-only', action='store_true',
-                       help='Check database only')
-    parser.add_argument('--redis-only', action='store_true',
-                       help='Check Redis cache only')
-    
-    args = parser.parse_args()
-    
-    success = True
+    args = _PARSER.parse_args()
     
-    if not args.redis_only:
-        success = await check_database(args.limit) and success
-        print()
+    # The checks are independent, so run them concurrently. Each one buffers
+    # its report, written whole afterwards so the two never interleave
+    checks = []
+    db_report = redis_report = None
+    # Disposes the engine and closes the Redis client however the checks end
+    async with AsyncExitStack() as clients:
+        if not args.redis_only:
+            engine = create_engine()
+            clients.push_async_callback(engine.dispose)
+            db_report = []
+            checks.append(check_database(engine, db_report, args.limit, args.exact_count))
+        if not args.db_only:
+            redis_client = await clients.enter_async_context(create_redis_client())
+            redis_report = []
+            checks.append(check_redis(redis_client, redis_report, args.show_ttl))
+        
+        results = await asyncio.gather(*checks)
     
-    if not args.db_only:
-        success = await check_redis() and success
+    if db_report is not None:
+        sys.stdout.write("".join(db_report) + "\n")
+    if redis_report is not None:
+        sys.stdout.write("".join(redis_report))
+    success = all(results)
     
     if success:
-        print("=" * 80)
-        print("✓ All checks passed!")
-        print("=" * 80)
+        sys.stdout.write(f"{BANNER}✓ All checks passed!\n{BANNER}")
     else:
-        print("=" * 80)
-        print("✗ Some checks failed")
-        print("=" * 80)
+        sys.stdout.write(f"{BANNER}✗ Some checks failed\n{BANNER}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())